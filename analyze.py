@@ -1,64 +1,356 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import logging
 import os
+import pickle
 import re
-import yaml
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 from squerly import *  # noqa
-from squerly import convert, List, Queryable
+from squerly import convert, Index, Interner, List, Queryable, SubtreeTable
+from squerly.loading import parse_document as _parse
+from squerly.query import _Queryable, _get_index
+from squerly.snapshot import load_snapshot, save_snapshot
 
-Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+log = logging.getLogger(__name__)
 
 
 def parse_args():
     p = argparse.ArgumentParser()
     p.add_argument("-v", "--verbose", action="store_true")
-    p.add_argument("paths", nargs="+")
-    return p.parse_args()
+    p.add_argument("-j", "--jobs", type=int, default=1,
+                   help="Processes used to parse files. 0 means one per CPU.")
+    p.add_argument("-c", "--cache", help="Directory for cached parse results.")
+    p.add_argument("-i", "--index", action="store_true",
+                   help="Index keys so find doesn't scan every document.")
+    p.add_argument("--compact", action="store_true",
+                   help="Use compact nodes to reduce memory.")
+    p.add_argument("--lazy", action="store_true",
+                   help="Convert documents as queries reach them.")
+    p.add_argument("--intern", action="store_true",
+                   help="Share one copy of each key across documents.")
+    p.add_argument("--intern-values", action="store_true",
+                   help="Share one copy of each short string value too.")
+    p.add_argument("--share", action="store_true",
+                   help="Store identical subtrees once across documents.")
+    p.add_argument("--snapshot", help="Save the loaded documents to this file.")
+    p.add_argument("--load", help="Load documents from a snapshot instead of paths.")
+    p.add_argument("paths", nargs="*")
+    args = p.parse_args()
+    if not args.paths and not args.load:
+        p.error("paths or --load is required.")
+    return args
 
 
 def _get_files(path):
-    with os.scandir(path) as it:
-        for ent in it:
-            if ent.is_dir(follow_symlinks=False):
-                for pth in _get_files(ent.path):
-                    yield pth
-            elif ent.is_file(follow_symlinks=False):
-                yield ent.path
-
+    """
+    Yields the files under path depth first, in the order scandir returns
+    them. Open directories are kept on a stack instead of recursing.
+    """
+    stack = [os.scandir(path)]
+    try:
+        while stack:
+            for ent in stack[-1]:
+                if ent.is_dir(follow_symlinks=False):
+                    stack.append(os.scandir(ent.path))
+                    break
+                elif ent.is_file(follow_symlinks=False):
+                    yield ent.path
+            else:
+                stack.pop().close()
+    finally:
+        for it in stack:
+            it.close()
 
-def analyze(paths, ignore=".*(log|txt)$"):
-    ignore = re.compile(ignore).search if ignore else lambda _: False
-    results = List()
-
-    def load(p):
-        if not ignore(p):
-            try:
-                with open(p) as f:
-                    doc = yaml.load(f, Loader=Loader)
-                    if isinstance(doc, (list, dict)):
-                        d = convert(doc)
-                        d.source = p
-                        results.append(d)
-            except:
-                pass
 
+def _get_paths(paths, ignore):
     for path in paths:
         if os.path.isfile(path):
-            load(path)
+            if not ignore(path):
+                yield path
         elif os.path.isdir(path):
             for p in _get_files(path):
-                load(p)
+                if not ignore(p):
+                    yield p
+
+
+class ParseCache(object):
+    """
+    Keeps parsed documents in a directory so files that haven't changed don't
+    have to be parsed again. An entry is used if the file's mtime and size
+    match what was cached. If they don't, the file's content hash is checked
+    before parsing it again, so touched but unchanged files are still hits.
+
+    Entries are kept under a directory for VERSION. Bump it when the parser
+    changes what it returns for the same file, so old entries are misses.
+
+    hits and misses count lookups made by analyze.
+    """
+
+    # 2: json is parsed with the json parser before falling back to yaml.
+    VERSION = 2
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, path):
+        key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "v%d" % self.VERSION, key[:2], key)
+
+    def _read(self, entry_path):
+        try:
+            with open(entry_path, "rb") as f:
+                return pickle.load(f)
+        except:
+            return None
+
+    def _write(self, entry_path, entry):
+        # Write to a temp file and rename so concurrent workers never see a
+        # partial entry.
+        directory = os.path.dirname(entry_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, entry_path)
+        except:
+            os.unlink(tmp)
+            raise
+
+    def load(self, path, parse=_parse):
+        """
+        Returns a tuple of the parsed document and whether it came from the
+        cache.
+        """
+        st = os.stat(path)
+        entry_path = self._entry_path(path)
+        entry = self._read(entry_path)
+        if entry and entry[:2] == (st.st_mtime_ns, st.st_size):
+            return entry[3], True
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        if entry and entry[2] == digest:
+            doc, hit = entry[3], True
+        else:
+            doc, hit = parse(data), False
+
+        try:
+            self._write(entry_path, (st.st_mtime_ns, st.st_size, digest, doc))
+        except (OSError, pickle.PicklingError, RecursionError) as ex:
+            # The document is still good even if it can't be cached.
+            log.warning("Couldn't cache %s: %s", path, ex)
+        return doc, hit
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return "%d hits, %d misses (%.1f%% hit rate)" % (self.hits, self.misses, rate)
+
+
+def _load_file(path, cache=None):
+    """
+    Parses a single file and returns a tuple of the document and whether it
+    came from the cache. The document is None if the file can't be loaded.
+    This runs in worker processes, so it returns plain data instead of a model.
+    """
+    try:
+        if cache is not None:
+            return cache.load(path)
+        with open(path, "rb") as f:
+            return _parse(f.read()), False
+    except:
+        return None, False
+
+
+def _load_files(files, workers, cache=None):
+    load = partial(_load_file, cache=cache)
+    if workers == 1 or len(files) < 2:
+        return map(load, files)
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        # map preserves input order, so results line up with files.
+        return list(ex.map(load, files, chunksize=chunksize))
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except:
+        return None
 
-    return Queryable(results)
+
+def _convert_files(files, workers, cache, index=None, compact=False, lazy=False, interner=None,
+                   share=None):
+    """
+    Yields each path in files with its converted document, or None if it
+    couldn't be loaded.
+    """
+    for path, (doc, hit) in zip(files, _load_files(files, workers, cache)):
+        if cache is not None:
+            if hit:
+                cache.hits += 1
+            else:
+                cache.misses += 1
+        if doc is None:
+            yield path, None
+        else:
+            d = convert(doc, index=index, compact=compact, lazy=lazy, interner=interner, share=share)
+            d.source = path
+            yield path, d
+
+
+class Analysis(_Queryable):
+    """
+    The queryable analyze returns. It works like any other, and refresh
+    brings it up to date with the files under the paths it was given.
+    """
+
+    __slots__ = ["_options", "_signatures"]
+
+    def __init__(self, value, options, signatures):
+        super(Analysis, self).__init__(value)
+        self._options = options
+        self._signatures = signatures
+
+    def refresh(self):
+        """
+        Rescans the paths given to analyze. New files and files whose mtime or
+        size changed are loaded, and documents from files that are gone are
+        dropped. Unchanged documents are kept as they are.
+
+        The List of documents and its index, if it has one, are updated in
+        place, so queryables that hold them see the changes too. The index is
+        rebuilt from the documents so it stays in find order.
+
+        Returns a tuple of the added, changed, and removed paths.
+        """
+        options = self._options
+        files = list(_get_paths(options["paths"], options["ignore"]))
+        old = self._signatures
+        new = dict((f, _signature(f)) for f in files)
+
+        added = [f for f in files if f not in old]
+        changed = [f for f in files if f in old and new[f] != old[f]]
+        removed = [f for f in old if f not in new]
+        self._signatures = new
+        if not (added or changed or removed):
+            return added, changed, removed
+
+        docs = dict((d.source, d) for d in self._value)
+        share = options["share"]
+        if share is not None:
+            # Old documents have to stop being parents of shared nodes, or
+            # roots could still lead to them.
+            for f in changed + removed:
+                if f in docs:
+                    share.release(docs[f])
+        docs.update(_convert_files(added + changed, options["workers"], options["cache"],
+                                   compact=options["compact"], lazy=options["lazy"],
+                                   interner=options["interner"], share=share))
+        self._value[:] = [docs[f] for f in files if docs.get(f) is not None]
+
+        index = _get_index(self._value)
+        if index is not None:
+            index.rebuild(self._value)
+
+        log.info("Refreshed: %d added, %d changed, %d removed", len(added), len(changed), len(removed))
+        return added, changed, removed
+
+
+def analyze(paths, ignore=".*(log|txt)$", workers=1, cache=None, index=False,
+            compact=False, lazy=False, interner=None, share=None):
+    """
+    Loads every yaml and json file under paths into a single List of
+    documents. Each document has a source attribute with the path it came
+    from. Returns an Analysis, which can refresh the List as files change.
+
+    workers is the number of processes used to parse files. 1 parses them in
+    this process, and 0 or None uses one process per CPU. Documents are in the
+    same order either way.
+
+    cache is a ParseCache or a directory to use for one. Its hits and misses
+    are updated with the lookups made for these paths.
+
+    If index is True, keys are indexed while the documents are converted so
+    find only has to look at documents that contain the keys it's given.
+
+    If compact is True, documents are converted with compact nodes, which use
+    much less memory. If lazy is True, they're converted as queries reach
+    them instead. lazy can't be combined with index, compact, or interner.
+
+    interner is an Interner that keys, and maybe values, are shared through,
+    or True for one that only interns keys. Its report says how much memory
+    that saved.
+
+    share is a SubtreeTable that identical subtrees are stored once through,
+    or True for a new one. Shared nodes can't be changed.
+    """
+    ignore = re.compile(ignore).search if ignore else lambda _: False
+    if cache is not None and not isinstance(cache, ParseCache):
+        cache = ParseCache(cache)
+    files = list(_get_paths(paths, ignore))
+    signatures = dict((f, _signature(f)) for f in files)
+    index = Index() if index else None
+    if interner is True:
+        interner = Interner()
+    if share is True:
+        share = SubtreeTable()
+
+    results = List()
+    for path, d in _convert_files(files, workers, cache, index, compact, lazy, interner, share):
+        if d is not None:
+            results.append(d)
+
+    options = {
+        "paths": list(paths),
+        "ignore": ignore,
+        "workers": workers,
+        "cache": cache,
+        "compact": compact,
+        "lazy": lazy,
+        "interner": interner,
+        "share": share,
+    }
+    return Analysis(Queryable(results, index=index)._value, options, signatures)
 
 
 def main():
     args = parse_args()
     logging.basicConfig(level=(logging.DEBUG if args.verbose else logging.INFO))
 
-    conf = analyze(args.paths)
+    if args.load:
+        conf = load_snapshot(args.load)
+    else:
+        cache = ParseCache(args.cache) if args.cache else None
+        interner = None
+        if args.intern or args.intern_values:
+            interner = Interner(values=args.intern_values)
+        share = SubtreeTable() if args.share else None
+        conf = analyze(args.paths, workers=args.jobs, cache=cache, index=args.index,
+                       compact=args.compact, lazy=args.lazy, interner=interner, share=share)
+        if cache is not None:
+            log.info("Parse cache: %s", cache.stats())
+        if interner is not None:
+            log.info("Interned strings: %s", interner.report())
+        if share is not None:
+            log.info("Shared subtrees: %s", share.report())
+
+    if args.snapshot:
+        save_snapshot(conf, args.snapshot)
+        log.info("Saved snapshot to %s", args.snapshot)
 
     import IPython
     from traitlets.config.loader import Config
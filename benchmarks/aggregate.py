@@ -0,0 +1,52 @@
+"""
+Compares exact and bounded-memory aggregations over a Result with many
+distinct values, reporting time and peak memory for each.
+
+    python -m benchmarks.aggregate --values 1000000 --distinct 500000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from squerly.query import Dict, List, Result, _Queryable
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--values", type=int, default=1000000)
+    p.add_argument("--distinct", type=int, default=500000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    rand = random.Random(args.seed)
+    names = ["pod-%d" % i for i in range(args.distinct)]
+    # A few hot values plus a long tail.
+    values = [names[i % 10] if i % 4 == 0 else rand.choice(names) for i in range(args.values)]
+    res = _Queryable(Result([Dict({"name": List(values)})]))
+
+    candidates = [
+        ("unique_values", lambda: len(res.unique_values)),
+        ("approx_distinct", lambda: res.approx_distinct()),
+        ("most_common", lambda: res.most_common(10)),
+        ("heavy_hitters", lambda: res.heavy_hitters(10)),
+        ("top_k", lambda: res.top_k(10)),
+        ("count_values", lambda: res.count_values("pod-1")),
+    ]
+
+    print("%d values, %d distinct" % (args.values, args.distinct))
+    print("%-16s %12s %12s  %s" % ("operation", "seconds", "peak MiB", "result"))
+    for name, f in candidates:
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = f()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if isinstance(result, list):
+            result = result[:2]
+        print("%-16s %12.3f %12.2f  %s" % (name, elapsed, peak / 2.0 ** 20, result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Generates synthetic kube resources shaped like the ones in a must-gather.
+Everything is derived from a seeded random number generator, so the same
+arguments always produce the same documents.
+"""
+import random
+
+KINDS = ["Pod", "Node", "Deployment", "ConfigMap", "KubeAPIServer"]
+
+
+def make_pod(i, containers=3, conditions=3):
+    return {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": "pod-%d" % i,
+            "namespace": "ns-%d" % (i % 50),
+            "labels": {"app": "app-%d" % (i % 200), "tier": "backend"},
+            "ownerReferences": [{"kind": "ReplicaSet", "name": "rs-%d" % (i % 500)}],
+        },
+        "spec": {
+            "containers": [
+                {
+                    "name": "c%d" % c,
+                    "image": "registry/image-%d:latest" % (i % 30),
+                    "ports": [{"containerPort": 8080 + c, "protocol": "TCP"}],
+                    "resources": {"requests": {"cpu": "100m", "memory": "128Mi"}},
+                }
+                for c in range(containers)
+            ],
+        },
+        "status": {
+            "phase": "Running",
+            "conditions": [
+                {"type": "Condition%d" % t, "status": "True"} for t in range(conditions)
+            ],
+        },
+    }
+
+
+def _metadata(rng, kind, i):
+    return {
+        "name": "%s-%d" % (kind.lower(), i),
+        "namespace": "ns-%d" % rng.randrange(50),
+        "uid": "%032x" % rng.getrandbits(128),
+        "labels": {"app": "app-%d" % rng.randrange(200), "tier": rng.choice(["frontend", "backend"])},
+    }
+
+
+def _conditions(rng, width):
+    return [
+        {
+            "type": "Condition%d" % c,
+            "status": rng.choice(["True", "False", "Unknown"]),
+            "message": "condition %d %s" % (c, rng.choice(["ok", "Permission denied", "timed out"])),
+        }
+        for c in range(width)
+    ]
+
+
+def _nested(rng, depth, width):
+    """
+    Builds an annotation-like tree depth levels deep, like the configs some
+    custom resources carry.
+    """
+    if depth == 0:
+        return "value-%d" % rng.randrange(1000)
+    return {"level%d-%d" % (depth, w): _nested(rng, depth - 1, width) for w in range(width)}
+
+
+def make_document(rng, i, depth=3, width=3):
+    kind = KINDS[i % len(KINDS)]
+    doc = {"apiVersion": "v1", "kind": kind, "metadata": _metadata(rng, kind, i)}
+    if kind == "Pod":
+        pod = make_pod(i, containers=width, conditions=width)
+        pod["metadata"] = doc["metadata"]
+        pod["status"]["conditions"] = _conditions(rng, width)
+        return pod
+    if kind == "Node":
+        doc["status"] = {
+            "conditions": _conditions(rng, width),
+            "addresses": [{"type": "InternalIP", "address": "10.0.%d.%d" % (i % 256, a)} for a in range(width)],
+        }
+    elif kind == "Deployment":
+        doc["spec"] = {"replicas": rng.randrange(1, 5), "template": {"spec": make_pod(i, width, width)["spec"]}}
+        doc["status"] = {"conditions": _conditions(rng, width)}
+    elif kind == "ConfigMap":
+        doc["data"] = _nested(rng, depth, width)
+    else:
+        revision = rng.randrange(2, 8)
+        doc["spec"] = {"observedConfig": _nested(rng, depth, width)}
+        doc["status"] = {
+            "conditions": _conditions(rng, width),
+            "latestAvailableRevision": revision,
+            "nodeStatuses": [
+                dict(
+                    {"nodeName": "control-plane-%d" % n, "currentRevision": revision - rng.randrange(2)},
+                    **({"targetRevision": revision} if rng.random() < 0.3 else {})
+                )
+                for n in range(width)
+            ],
+        }
+    return doc
+
+
+def make_documents(count, depth=3, width=3, seed=0):
+    """
+    Returns count documents cycling through KINDS. depth controls how deep the
+    nested config trees go, and width controls list lengths and fan out.
+    """
+    rng = random.Random(seed)
+    return [make_document(rng, i, depth, width) for i in range(count)]
@@ -0,0 +1,57 @@
+"""
+Times chained finds and the len and truthiness checks made on their results.
+The uncached column walks Result.values for every check, which is what
+Result.__len__ did before it cached its count.
+
+    python -m benchmarks.find_chains --docs 2000
+"""
+import argparse
+import time
+
+from squerly import Queryable
+from squerly.query import Result
+
+from .data import make_pod
+
+
+def uncached_len(res):
+    return len(list(Result.values.fget(res)))
+
+
+CHAINS = [
+    ("find containers name", lambda c: c.find("containers", "name")),
+    ("find conditions status", lambda c: c.find("conditions", "status")),
+    ("find metadata labels app", lambda c: c.find("metadata", "labels", "app")),
+]
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    res = f(*args)
+    return res, time.perf_counter() - start
+
+
+def checks(res, length, n):
+    for _ in range(n):
+        length(res)
+        bool(res)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--docs", type=int, default=2000)
+    p.add_argument("--checks", type=int, default=20)
+    args = p.parse_args()
+
+    conf = Queryable([make_pod(i) for i in range(args.docs)])
+    print("%d len and bool checks per result" % args.checks)
+    print("%-28s %10s %10s %10s" % ("chain", "find", "cached", "uncached"))
+    for name, chain in CHAINS:
+        res, find = timed(chain, conf)
+        _, cached = timed(checks, res._value, len, args.checks)
+        _, uncached = timed(checks, Result(res._value), uncached_len, args.checks)
+        print("%-28s %9.3fs %9.4fs %9.4fs" % (name, find, cached, uncached))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Measures how long AsyncLoader takes to collect one document from each of
+many unix sockets. Each server waits before it answers, like a collector
+endpoint would. The loader reads one socket at a time with --limit 1, which
+is what going through from_yaml or Queryable one source at a time amounts
+to, and then many at once.
+
+    python -m benchmarks.loading --sockets 200 --delay 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from functools import partial
+
+from squerly import AsyncLoader
+
+from .data import make_pod
+
+
+async def measure(count, delay, limit):
+    directory = tempfile.mkdtemp()
+    servers = []
+    paths = []
+    for i in range(count):
+        data = json.dumps(make_pod(i)).encode("utf-8")
+
+        async def serve(reader, writer, data=data):
+            await asyncio.sleep(delay)
+            writer.write(data)
+            await writer.drain()
+            writer.close()
+
+        path = os.path.join(directory, "s%d" % i)
+        servers.append(await asyncio.start_unix_server(serve, path=path))
+        paths.append(path)
+
+    try:
+        loader = AsyncLoader(limit=limit)
+        start = time.perf_counter()
+        conf = await loader.load([partial(asyncio.open_unix_connection, p) for p in paths])
+        elapsed = time.perf_counter() - start
+        assert len(conf.kind.values) == count
+        return elapsed
+    finally:
+        for s in servers:
+            s.close()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sockets", type=int, default=200)
+    p.add_argument("--delay", type=float, default=0.02)
+    args = p.parse_args()
+
+    print("%d sockets, %.0f ms each" % (args.sockets, args.delay * 1000))
+    for limit in (1, 16, 64, args.sockets):
+        elapsed = asyncio.run(measure(args.sockets, args.delay, limit))
+        print("limit %-6d %8.3fs %10.0f docs/s" % (limit, elapsed, args.sockets / elapsed))
+
+
+if __name__ == "__main__":
+    main()
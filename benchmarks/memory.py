@@ -0,0 +1,89 @@
+"""
+Compares the memory used by regular and compact models built from the same
+synthetic pod documents, by models whose strings are interned, and by
+models whose identical subtrees are shared through a SubtreeTable. Each
+document is parsed from its own json text for those, like analyze does with
+files, so documents don't share strings to begin with. The memory used by
+the table itself is included.
+
+    python -m benchmarks.memory --docs 20000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from squerly import Interner, SubtreeTable, make_model
+
+from .data import make_pod
+
+
+def count_nodes(d):
+    if isinstance(d, dict):
+        return 1 + sum(count_nodes(v) for v in d.values())
+    if isinstance(d, list):
+        return 1 + sum(count_nodes(v) for v in d)
+    return 0
+
+
+def measure(data, compact):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    model = make_model(data, compact=compact)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del model
+    return size, elapsed
+
+
+def measure_parsed(texts, interner, share=None):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    models = [make_model(json.loads(t), interner=interner, share=share) for t in texts]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del models
+    return size, elapsed
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--docs", type=int, default=5000)
+    args = p.parse_args()
+
+    data = [make_pod(i) for i in range(args.docs)]
+    nodes = count_nodes(data)
+    print("%d documents, %d nodes" % (args.docs, nodes))
+
+    results = {}
+    for mode, compact in (("regular", False), ("compact", True)):
+        size, elapsed = measure(data, compact)
+        results[mode] = size
+        print("%-8s %10.1f MiB %8.1f bytes/node %8.3fs" % (mode, size / 2.0 ** 20, size / float(nodes), elapsed))
+
+    print("compact saves %.1f%%" % (100.0 * (1 - results["compact"] / float(results["regular"]))))
+
+    texts = [json.dumps(d) for d in data]
+    modes = (
+        ("parsed", None, None),
+        ("keys", Interner(), None),
+        ("values", Interner(values=True), None),
+        ("shared", None, SubtreeTable()),
+        ("both", Interner(values=True), SubtreeTable()),
+    )
+    for mode, interner, share in modes:
+        size, elapsed = measure_parsed(texts, interner, share)
+        results[mode] = size
+        print("%-8s %10.1f MiB %8.1f bytes/node %8.3fs" % (mode, size / 2.0 ** 20, size / float(nodes), elapsed))
+        for report in (interner, share):
+            if report is not None:
+                print("         %s" % report.report())
+
+
+if __name__ == "__main__":
+    main()
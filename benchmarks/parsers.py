@@ -0,0 +1,63 @@
+"""
+Compares how fast generated documents are parsed from yaml and from json,
+and how long it takes to load them into models, like analyze does:
+
+- yaml: yaml.load with the C loader if it's available.
+- json: the stdlib json module.
+- json fast: the parser squerly uses, which is orjson or ujson if one is
+  installed.
+
+    python -m benchmarks.parsers --docs 2000
+"""
+import argparse
+import json
+import time
+
+import yaml
+
+from squerly import make_model
+from squerly.query import json_loads
+
+from .data import make_documents
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def best(f, repeat):
+    res = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        res = elapsed if res is None else min(res, elapsed)
+    return res
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--docs", type=int, default=2000)
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    docs = make_documents(args.docs)
+    yaml_data = [yaml.dump(d, Dumper=Dumper).encode("utf-8") for d in docs]
+    json_data = [json.dumps(d).encode("utf-8") for d in docs]
+
+    candidates = [
+        ("yaml", yaml_data, lambda data: yaml.load(data, Loader=Loader)),
+        ("json", json_data, json.loads),
+        ("json fast", json_data, json_loads),
+    ]
+
+    print("%d docs, best of %d, fast json is %s" % (args.docs, args.repeat, json_loads.__module__))
+    print("%-10s %10s %10s %12s" % ("parser", "parse s", "MiB/s", "parse+model"))
+    for name, data, parse in candidates:
+        size = sum(len(d) for d in data) / 2.0 ** 20
+        parse_only = best(lambda: [parse(d) for d in data], args.repeat)
+        with_model = best(lambda: [make_model(parse(d)) for d in data], args.repeat)
+        print("%-10s %10.3f %10.1f %12.3f" % (name, parse_only, size / parse_only, with_model))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compares ways of matching many regular expressions against the messages in
+generated documents:
+
+- uncompiled: an Any of predicates that call re.search with the pattern
+  string, which is how search worked before it compiled patterns. With more
+  patterns than re's cache holds, every call compiles again.
+- compiled: an Any of search predicates, each compiled once.
+- combined: search_any, one compiled alternation of every pattern.
+
+    python -m benchmarks.regex --docs 2000 --patterns 600
+"""
+import argparse
+import re
+import time
+
+from squerly import List, Queryable, flip, make_model, pred, search, search_any
+from squerly.boolean import Any
+
+from .data import make_documents
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--docs", type=int, default=2000)
+    p.add_argument("--patterns", type=int, default=600)
+    args = p.parse_args()
+
+    conf = Queryable(List(make_model(d) for d in make_documents(args.docs)))
+    # Only the last pattern matches anything, so every value is tested
+    # against all of them.
+    patterns = ["no match %d$" % i for i in range(args.patterns - 1)] + ["Perm.*denied"]
+
+    uncompiled = pred(flip(re.search))
+    candidates = [
+        ("uncompiled", Any(*[uncompiled(p) for p in patterns])),
+        ("compiled", Any(*[search(p) for p in patterns])),
+        ("combined", search_any(patterns)),
+    ]
+
+    print("%d docs, %d patterns" % (args.docs, args.patterns))
+    for name, predicate in candidates:
+        start = time.perf_counter()
+        count = len(conf.find(("message", predicate)))
+        print("%-12s %8d matches %9.3fs" % (name, count, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Times squerly operations against synthetic documents and reports how long
+each takes and how much memory it allocates at its peak.
+
+    python -m benchmarks --docs 5000 --output results.json
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from squerly import List, Queryable, isin, make_model, matches, q
+
+from .data import make_documents
+
+
+def _roots(docs, **kwargs):
+    return Queryable(List(make_model(d, **kwargs) for d in docs))
+
+
+class Context(object):
+    def __init__(self, docs):
+        self.docs = docs
+        self.conf = _roots(docs)
+        # A separate model, since the index is attached to the model itself.
+        self.indexed = Queryable(_roots(docs)._value, index=True)
+
+
+SCENARIOS = [
+    ("make_model", lambda c: _roots(c.docs)),
+    ("make_model compact", lambda c: _roots(c.docs, compact=True)),
+    ("find name", lambda c: c.conf.find("name")),
+    ("find name indexed", lambda c: c.indexed.find("name")),
+    ("find (kind, Pod)", lambda c: c.conf.find(("kind", "Pod"))),
+    ("find (kind, Pod) indexed", lambda c: c.indexed.find(("kind", "Pod"))),
+    ("find (message, matches)", lambda c: c.conf.find(("message", matches("Perm")))),
+    ("find chain", lambda c: c.conf.find("conditions", "status")),
+    ("query chain", lambda c: c.conf.status.nodeStatuses.nodeName),
+    ("where name value", lambda c: c.conf.where("kind", "Node")),
+    ("where lambda", lambda c: c.conf.status.nodeStatuses.where(lambda s: s.currentRevision != s.targetRevision)),
+    ("where boolean", lambda c: c.conf.status.conditions.where(
+        q("message", matches("denied$")) & (q("status", "False") & q("type", isin({"Condition0", "Condition1"}))))),
+    ("upto", lambda c: c.conf.find(("status", "False")).upto("conditions")),
+    ("parents", lambda c: c.conf.find("status").parents),
+    ("roots", lambda c: c.conf.find("nodeName").roots),
+    ("keys", lambda c: c.conf.find("metadata").keys()),
+    ("columns by query", lambda c: [c.conf.metadata.name.values, c.conf.metadata.namespace.values, c.conf.kind.values]),
+    ("columns by select", lambda c: c.conf.select("metadata.name", "metadata.namespace", "kind")),
+]
+
+
+def measure(f, repeat):
+    """
+    Returns the best time over repeat runs and the peak memory allocated by a
+    separate traced run, since tracing slows everything down.
+    """
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        f()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run(docs=2000, depth=3, width=3, seed=0, repeat=3, only=None):
+    context = Context(make_documents(docs, depth=depth, width=width, seed=seed))
+
+    results = []
+    for name, scenario in SCENARIOS:
+        if only and not any(o in name for o in only):
+            continue
+        seconds, peak = measure(lambda: scenario(context), repeat)
+        results.append({"name": name, "seconds": seconds, "peak_bytes": peak})
+
+    return {
+        "params": {"docs": docs, "depth": depth, "width": width, "seed": seed, "repeat": repeat},
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def format_report(report):
+    lines = ["%(docs)d docs, depth %(depth)d, width %(width)d, seed %(seed)d, best of %(repeat)d" % report["params"]]
+    lines.append("%-28s %12s %12s" % ("scenario", "seconds", "peak MiB"))
+    for r in report["results"]:
+        lines.append("%-28s %12.4f %12.2f" % (r["name"], r["seconds"], r["peak_bytes"] / 2.0 ** 20))
+    return "\n".join(lines)
+
+
+def parse_args(args=None):
+    p = argparse.ArgumentParser(prog="python -m benchmarks")
+    p.add_argument("--docs", type=int, default=2000)
+    p.add_argument("--depth", type=int, default=3)
+    p.add_argument("--width", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("-k", "--only", action="append", help="Only run scenarios whose names contain this.")
+    p.add_argument("-o", "--output", help="Also write the report to this file as json.")
+    return p.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+    report = run(args.docs, args.depth, args.width, args.seed, args.repeat, args.only)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
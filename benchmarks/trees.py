@@ -0,0 +1,124 @@
+"""
+Measures how many nodes per second make_model and _flatten handle on wide
+and deep trees, compared to the recursive versions they replaced.
+
+- wide: a list of documents with many keys and short lists at each level.
+- deep: chains of dicts and lists. The recursive versions can't handle
+  chains deeper than the recursion limit, so they're kept below that.
+- very deep: one chain as long as the requested size, which only the
+  iterative versions can handle.
+
+    python -m benchmarks.trees --nodes 500000
+"""
+import argparse
+import sys
+import time
+
+from squerly.query import _DICTS, _LISTS, Dict, List, Result, _flatten, make_model
+
+
+def recursive_make_model(d, parent=None):
+    if isinstance(d, list):
+        node = List(parent=parent)
+        node.extend(recursive_make_model(v, node) for v in d)
+        return node
+    elif isinstance(d, dict):
+        node = Dict(parent=parent)
+        for k, v in d.items():
+            node[k] = recursive_make_model(v, node)
+        return node
+    else:
+        return d
+
+
+def recursive_flatten(obj):
+    if isinstance(obj, _DICTS):
+        yield obj
+        for v in obj.values():
+            for i in recursive_flatten(v):
+                yield i
+    elif isinstance(obj, _LISTS + (Result,)):
+        for v in obj:
+            for i in recursive_flatten(v):
+                yield i
+    else:
+        yield obj
+
+
+def wide_tree(nodes, width=10):
+    def doc(depth):
+        if depth == 0:
+            return {"key%d" % i: i for i in range(width)}
+        d = {"key%d" % i: "value%d" % i for i in range(width // 2)}
+        d["children"] = [doc(depth - 1) for _ in range(2)]
+        return d
+
+    one = doc(3)
+    per_doc = count(one)
+    return [doc(3) for _ in range(max(1, nodes // per_doc))]
+
+
+def deep_tree(nodes, depth=None):
+    depth = depth or min(nodes // 3, sys.getrecursionlimit() // 8)
+    doc = leaf = {}
+    for i in range(depth):
+        leaf["name"] = "level%d" % i
+        leaf["child"] = [{}]
+        leaf = leaf["child"][0]
+    # Repeat the chain to reach the requested size.
+    return [doc] * max(1, nodes // (depth * 3))
+
+
+def count(d):
+    res = 0
+    stack = [d]
+    while stack:
+        d = stack.pop()
+        res += 1
+        if isinstance(d, dict):
+            stack.extend(d.values())
+        elif isinstance(d, list):
+            stack.extend(d)
+    return res
+
+
+def best(f, repeat):
+    res = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        res = elapsed if res is None else min(res, elapsed)
+    return res
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--nodes", type=int, default=500000)
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    print("%-10s %-22s %12s %14s" % ("tree", "operation", "seconds", "nodes/s"))
+    trees = [
+        ("wide", wide_tree(args.nodes)),
+        ("deep", deep_tree(args.nodes)),
+        ("very deep", deep_tree(args.nodes, args.nodes // 3)),
+    ]
+    for name, tree in trees:
+        nodes = sum(count(d) for d in tree)
+        model = make_model(tree)
+        candidates = [
+            ("make_model recursive", lambda: recursive_make_model(tree)),
+            ("make_model", lambda: make_model(tree)),
+            ("_flatten recursive", lambda: sum(1 for _ in recursive_flatten(model))),
+            ("_flatten", lambda: sum(1 for _ in _flatten(model))),
+        ]
+        if name == "very deep":
+            candidates = candidates[1::2]
+        for op, f in candidates:
+            seconds = best(f, args.repeat)
+            print("%-10s %-22s %12.3f %14.0f" % (name, op, seconds, nodes / seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ docs = set([
 ])
 
 optional = set([
+    "orjson",
     "pandas",
     "IPython"
 ])
@@ -42,7 +43,7 @@ if __name__ == "__main__":
         url="https://github.com/csams/squerly",
         author="Christopher Sams",
         author_email="csams@gmail.com",
-        packages=find_packages(),
+        packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
         install_requires=list(runtime),
         package_data={"": ["LICENSE"]},
         license="Apache 2.0",
@@ -1,6 +1,22 @@
+from . import aggregate  # noqa
 from . import boolean  # noqa
+from . import interning  # noqa
+from . import loading  # noqa
+from . import profiling  # noqa
 from . import query  # noqa
+from . import rendering  # noqa
+from . import sharing  # noqa
+from . import snapshot  # noqa
+from . import stream  # noqa
+from .aggregate import *  # noqa
 from .boolean import *  # noqa
+from .interning import *  # noqa
+from .loading import *  # noqa
+from .profiling import *  # noqa
 from .query import *  # noqa
+from .rendering import *  # noqa
+from .sharing import *  # noqa
+from .snapshot import *  # noqa
+from .stream import *  # noqa
 
-__all__ = boolean.__all__ + query.__all__
+__all__ = aggregate.__all__ + boolean.__all__ + interning.__all__ + loading.__all__ + profiling.__all__ + query.__all__ + rendering.__all__ + sharing.__all__ + snapshot.__all__ + stream.__all__
@@ -0,0 +1,172 @@
+"""
+The aggregate module has summaries that take values one at a time and use
+a fixed amount of memory no matter how many values or distinct values they
+see. _Queryable uses them for approx_distinct and heavy_hitters.
+"""
+import heapq
+import math
+
+__all__ = [
+    "HyperLogLog",
+    "SpaceSaving",
+]
+
+_MASK = (1 << 64) - 1
+
+
+def _mix(h):
+    """
+    Spreads the bits of a hash across all 64 bits. Python hashes small ints to
+    themselves, which would put them all in the same few registers.
+    """
+    h &= _MASK
+    h ^= h >> 33
+    h = (h * 0xFF51AFD7ED558CCD) & _MASK
+    h ^= h >> 33
+    h = (h * 0xC4CEB9FE1A85EC53) & _MASK
+    h ^= h >> 33
+    return h
+
+
+def _hash(value):
+    try:
+        return _mix(hash(value))
+    except TypeError:
+        return _mix(hash(repr(value)))
+
+
+class HyperLogLog(object):
+    """
+    Estimates how many distinct values it's seen. It uses 2 ** precision bytes,
+    and the estimate is usually within 1.04 / sqrt(2 ** precision) of the real
+    count, about 0.8% with the default precision.
+
+    Values are hashed with hash, so estimates only make sense within one
+    process. Unhashable values are hashed by their repr.
+    """
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18.")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        p = self.precision
+        x = _hash(value)
+        i = x >> (64 - p)
+        rank = (64 - p) - (x & ((1 << (64 - p)) - 1)).bit_length() + 1
+        if rank > self.registers[i]:
+            self.registers[i] = rank
+
+    def update(self, values):
+        # add, inlined, since this is where the time goes.
+        registers = self.registers
+        shift = 64 - self.precision
+        low = (1 << shift) - 1
+        for v in values:
+            try:
+                h = hash(v) & _MASK
+            except TypeError:
+                h = hash(repr(v)) & _MASK
+            h ^= h >> 33
+            h = (h * 0xFF51AFD7ED558CCD) & _MASK
+            h ^= h >> 33
+            h = (h * 0xC4CEB9FE1A85EC53) & _MASK
+            h ^= h >> 33
+            i = h >> shift
+            rank = shift - (h & low).bit_length() + 1
+            if rank > registers[i]:
+                registers[i] = rank
+
+    def merge(self, other):
+        """
+        Adds everything other has seen. Both must have the same precision.
+        """
+        if other.precision != self.precision:
+            raise ValueError("Can't merge HyperLogLogs with different precisions.")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self):
+        m = len(self.registers)
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+
+        e = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if e <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities.
+            e = m * math.log(float(m) / zeros)
+        return int(round(e))
+
+    def __len__(self):
+        return self.estimate()
+
+
+class SpaceSaving(object):
+    """
+    Finds the most frequent values while tracking at most capacity of them.
+    When it's full, a new value replaces the one with the lowest count and
+    inherits that count, so counts are upper bounds. Any value that occurs
+    more than total / capacity times is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity=1000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        # (count, seq, value) entries. Increments push new entries instead of
+        # updating old ones, so entries that don't match counts are stale.
+        self._heap = []
+        self._seq = 0
+
+    def _push(self, value, count):
+        self._seq += 1
+        heapq.heappush(self._heap, (count, self._seq, value))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, i, v) for c, i, v in self._heap if self.counts.get(v) == c]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, _, value = heapq.heappop(self._heap)
+            if self.counts.get(value) == count:
+                return value, count
+
+    def add(self, value):
+        self.total += 1
+        counts = self.counts
+        if value in counts:
+            counts[value] += 1
+        elif len(counts) < self.capacity:
+            counts[value] = 1
+            self.errors[value] = 0
+        else:
+            evicted, low = self._pop_min()
+            del counts[evicted]
+            del self.errors[evicted]
+            counts[value] = low + 1
+            self.errors[value] = low
+        self._push(value, counts[value])
+
+    def update(self, values):
+        for v in values:
+            self.add(v)
+
+    def most_common(self, n=None):
+        """
+        Returns (value, count) tuples for the n values with the highest counts,
+        or all that are tracked. A count can be too high by at most
+        errors[value].
+        """
+        items = sorted(self.counts.items(), key=lambda i: i[1], reverse=True)
+        return items if n is None else items[:n]
@@ -6,7 +6,9 @@ import logging
 import operator
 import re
 
-from functools import partial, wraps
+from functools import lru_cache, partial, wraps
+
+from . import profiling
 
 log = logging.getLogger(__name__)
 
@@ -23,13 +25,26 @@ __all__ = [
     "isin",
     "contains",
     "search",
+    "search_any",
     "matches",
+    "matches_any",
     "startswith",
     "endswith",
+    "optimize",
 ]
 
+# Rough relative costs of evaluating predicates, used to decide which
+# operands of an All or Any to try first. Anything unknown, like a user
+# function, is assumed to be expensive.
+CHEAP = 1
+MODERATE = 2
+EXPENSIVE = 5
+UNKNOWN = 10
+
 
 class Boolean:
+    cost = UNKNOWN
+
     def test(self, value):
         raise NotImplementedError()
 
@@ -47,6 +62,10 @@ class Any(Boolean):
     def __init__(self, *predicates):
         self.predicates = predicates
 
+    @property
+    def cost(self):
+        return sum(p.cost for p in self.predicates)
+
     def test(self, value):
         return any(predicate.test(value) for predicate in self.predicates)
 
@@ -55,6 +74,10 @@ class All(Boolean):
     def __init__(self, *predicates):
         self.predicates = predicates
 
+    @property
+    def cost(self):
+        return sum(p.cost for p in self.predicates)
+
     def test(self, value):
         return all(predicate.test(value) for predicate in self.predicates)
 
@@ -63,6 +86,10 @@ class Not(Boolean):
     def __init__(self, predicate):
         self.predicate = predicate
 
+    @property
+    def cost(self):
+        return self.predicate.cost
+
     def test(self, value):
         return not self.predicate.test(value)
 
@@ -75,12 +102,24 @@ class Predicate(Boolean):
         self.args = args
         self.kwargs = kwargs
 
+    @property
+    def cost(self):
+        if self.predicate is _isin and self.args and not isinstance(self.args[0], (set, frozenset, dict)):
+            return MODERATE
+        try:
+            return _COSTS.get(self.predicate, UNKNOWN)
+        except TypeError:
+            # Unhashable callables, like instances of classes that define
+            # __eq__ without __hash__.
+            return UNKNOWN
+
     def test(self, value):
         try:
             return self.predicate(value, *self.args, **self.kwargs)
         except Exception as ex:
             if log.isEnabledFor(logging.DEBUG):
                 log.debug(ex)
+            profiling.swallowed()
             return False
 
 
@@ -102,11 +141,15 @@ def flip(f):
 
 
 class TRUE(Boolean):
+    cost = 0
+
     def test(self, value):
         return True
 
 
 class FALSE(Boolean):
+    cost = 0
+
     def test(self, value):
         return False
 
@@ -120,10 +163,268 @@ eq = pred(operator.eq)
 ge = pred(operator.ge)
 gt = pred(operator.gt)
 
-isin = pred(flip(operator.contains))
+_isin = flip(operator.contains)
+isin = pred(_isin)
 
 contains = pred(operator.contains)
-search = pred(flip(re.search))
+
+# re's own cache is cleared once a session has used a few hundred patterns,
+# so keep a bigger one.
+compile_pattern = lru_cache(maxsize=4096)(re.compile)
+
+
+def _search(value, regex):
+    return regex.search(value) is not None
+
+
+def _search_pattern(value, pattern, flags):
+    return re.search(pattern, value, flags) is not None
+
+
+def search(pattern, flags=0):
+    """
+    True for strings that contain a match for pattern. The pattern is
+    compiled once, when the predicate is created. If it can't be compiled,
+    the error is raised when values are tested, like before, so the
+    predicate is just False for them.
+    """
+    try:
+        return Predicate(_search, compile_pattern(pattern, flags))
+    except (re.error, TypeError):
+        return Predicate(_search_pattern, pattern, flags)
+
+
+def _combinable(pattern, flags):
+    """
+    True if pattern can be put in an alternation with others and still mean
+    the same thing. Groups would be renumbered, which breaks backreferences,
+    and inline flags like (?i) would apply to all of them.
+    """
+    try:
+        regex = compile_pattern(pattern, flags)
+    except (re.error, TypeError):
+        return False
+    return regex.groups == 0 and regex.flags == compile_pattern("", flags).flags
+
+
+def search_any(patterns, flags=0, literal=False):
+    """
+    True for strings that contain a match for any of patterns. Patterns
+    without groups or inline flags are combined into a single regular
+    expression, so each string is scanned once for all of them. The others
+    are searched one at a time. If literal is True, the patterns are plain
+    strings instead of regular expressions.
+    """
+    patterns = [re.escape(p) for p in patterns] if literal else list(patterns)
+    combined = [p for p in patterns if _combinable(p, flags)]
+    predicates = [search(p, flags) for p in patterns if not _combinable(p, flags)]
+    if combined:
+        predicates.insert(0, search("|".join("(?:%s)" % p for p in combined), flags))
+    if not predicates:
+        return FALSE
+    return predicates[0] if len(predicates) == 1 else Any(*predicates)
+
+
 matches = search
+matches_any = search_any
 startswith = pred(str.startswith)
 endswith = pred(str.endswith)
+
+_COSTS = {
+    operator.lt: CHEAP,
+    operator.le: CHEAP,
+    operator.eq: CHEAP,
+    operator.ge: CHEAP,
+    operator.gt: CHEAP,
+    _isin: CHEAP,
+    operator.contains: MODERATE,
+    str.startswith: MODERATE,
+    str.endswith: MODERATE,
+    _search: EXPENSIVE,
+    _search_pattern: EXPENSIVE,
+}
+
+
+def cost(value):
+    """
+    Returns the estimated cost of testing a name or value in a query.
+    """
+    if isinstance(value, Boolean):
+        return value.cost
+    if callable(value):
+        return UNKNOWN
+    return CHEAP
+
+
+def _direct(predicate):
+    """
+    Returns a function that calls a Predicate's function without unpacking
+    args and kwargs on every call. It doesn't catch exceptions.
+    """
+    f, args = predicate.predicate, predicate.args
+    if f is _search:
+        return args[0].search
+    if predicate.kwargs or len(args) > 1:
+        return lambda value: f(value, *args, **predicate.kwargs)
+    if not args:
+        return f
+    arg = args[0]
+    return lambda value: f(value, arg)
+
+
+class _Sequence(Boolean):
+    """
+    An optimized All or Any. Operands are tested in order of cost, and plain
+    Predicates are called directly. As with Predicate.test, an operand that
+    raises an exception counts as False.
+    """
+
+    def __init__(self, operands, conjunction):
+        self.operands = sorted(operands, key=lambda o: o.cost)
+        self.conjunction = conjunction
+        self.cost = sum(o.cost for o in self.operands)
+        self._tests = [self._test_for(o) for o in self.operands]
+
+    @staticmethod
+    def _test_for(operand):
+        return _direct(operand) if type(operand) is Predicate else operand.test
+
+    def test(self, value):
+        if self.conjunction:
+            try:
+                for t in self._tests:
+                    if not t(value):
+                        return False
+            except Exception:
+                profiling.swallowed()
+                return False
+            return True
+
+        for t in self._tests:
+            try:
+                if t(value):
+                    return True
+            except Exception:
+                profiling.swallowed()
+        return False
+
+
+class _Adaptive(_Sequence):
+    """
+    An optimized All or Any that also tracks how often each operand decides
+    the result. Every interval tests it reorders them by cost divided by that
+    rate, so cheap operands that usually decide the result go first.
+    """
+
+    def __init__(self, operands, conjunction, interval=1000):
+        super(_Adaptive, self).__init__(operands, conjunction)
+        self.interval = interval
+        self._calls = 0
+        self._decided = [0] * len(self.operands)
+
+    def _reorder(self):
+        n = float(self._calls)
+        ranked = sorted(
+            range(len(self.operands)),
+            key=lambda i: self.operands[i].cost / ((self._decided[i] + 1) / (n + 2)),
+        )
+        self.operands = [self.operands[i] for i in ranked]
+        self._tests = [self._tests[i] for i in ranked]
+        # Halve the counts so the order can follow changes in the data.
+        self._decided = [self._decided[i] // 2 for i in ranked]
+        self._calls //= 2
+
+    def test(self, value):
+        self._calls += 1
+        if self._calls % self.interval == 0:
+            self._reorder()
+
+        decides = not self.conjunction
+        for i, t in enumerate(self._tests):
+            try:
+                result = bool(t(value))
+            except Exception:
+                profiling.swallowed()
+                result = False
+            if result is decides:
+                self._decided[i] += 1
+                return decides
+        return not decides
+
+
+def _flatten(b, kind):
+    for p in b.predicates:
+        if isinstance(p, kind):
+            for i in _flatten(p, kind):
+                yield i
+        else:
+            yield p
+
+
+def optimize(predicate, adaptive=False):
+    """
+    Returns an equivalent Boolean that's cheaper to evaluate. Nested Alls and
+    Anys are flattened, double negations are removed, and operands are
+    ordered so cheap tests like equality, isin on a set, and startswith run
+    before regular expressions and user functions.
+
+    If adaptive is True, Alls and Anys also reorder their operands as they
+    run based on how often each one decides the result.
+    """
+    if isinstance(predicate, (All, Any)):
+        conjunction = isinstance(predicate, All)
+        kind = All if conjunction else Any
+        operands = [optimize(p, adaptive) for p in _flatten(predicate, kind)]
+        if len(operands) == 1:
+            return operands[0]
+        if adaptive:
+            return _Adaptive(operands, conjunction)
+        return _Sequence(operands, conjunction)
+
+    if isinstance(predicate, Not):
+        if isinstance(predicate.predicate, Not):
+            return optimize(predicate.predicate.predicate, adaptive)
+        return Not(optimize(predicate.predicate, adaptive))
+
+    # WhereBooleans from the query module optimize themselves.
+    if not isinstance(predicate, Boolean) and hasattr(predicate, "optimize"):
+        return predicate.optimize(adaptive)
+
+    return predicate
+
+
+def equality_values(predicate):
+    """
+    Returns the set of values predicate accepts if all it does is compare
+    values for equality, like eq(1), isin({"a", "b"}), or an Any of those,
+    optimized or not. Returns None for anything else.
+    """
+    operands = None
+    if isinstance(predicate, Any):
+        operands = predicate.predicates
+    elif isinstance(predicate, _Sequence) and not predicate.conjunction:
+        operands = predicate.operands
+
+    if operands is not None:
+        res = set()
+        for p in operands:
+            values = equality_values(p)
+            if values is None:
+                return None
+            res |= values
+        return res
+
+    if not isinstance(predicate, Predicate) or predicate.kwargs or len(predicate.args) != 1:
+        return None
+
+    arg = predicate.args[0]
+    try:
+        if predicate.predicate is operator.eq:
+            return set([arg])
+        # isin on a string tests for substrings, so only plain collections
+        # can be treated as a set of values.
+        if predicate.predicate is _isin and isinstance(arg, (set, frozenset, list, tuple)):
+            return set(arg)
+    except TypeError:
+        pass
+    return None
@@ -0,0 +1,87 @@
+"""
+The interning module lets models built from many documents share a single
+copy of each repeated string. Parsers create new strings for every key and
+value in every document, so keys like apiVersion, kind, and metadata and
+values like namespaces and image names are otherwise stored thousands of
+times.
+"""
+import sys
+
+__all__ = [
+    "Interner",
+]
+
+
+class Interner(object):
+    """
+    A table of shared strings. make_model uses it to replace the keys, and
+    optionally the string values, of everything it copies with the first
+    equal string it saw.
+
+    If values is True, string values up to max_length characters are interned
+    too. Long values like certificates are rarely repeated, so they'd only
+    grow the table.
+
+    saved is the number of bytes taken by strings that were replaced with
+    shared ones. They're only freed if nothing else refers to them, which is
+    the case for documents analyze parses. Parsers often share strings within
+    a document, so each one is only counted once per document. make_model
+    calls start_document before it copies one.
+    """
+
+    def __init__(self, values=False, max_length=256):
+        self.values = values
+        self.max_length = max_length
+        self.table = {}
+        self.lookups = 0
+        self.replaced = 0
+        self.saved = 0
+        # ids of strings counted in saved for the current document. They're
+        # still alive, so their ids can't be reused until it's done.
+        self._counted = set()
+
+    def start_document(self):
+        self._counted.clear()
+
+    def __call__(self, s):
+        self.lookups += 1
+        shared = self.table.setdefault(s, s)
+        if shared is not s:
+            self.replaced += 1
+            if id(s) not in self._counted:
+                self._counted.add(id(s))
+                self.saved += sys.getsizeof(s)
+        return shared
+
+    def _value(self, v):
+        if type(v) is str and len(v) <= self.max_length:
+            return self(v)
+        return v
+
+    def copy_dict(self, d):
+        """
+        Returns a copy of d with interned keys, and values if they're enabled.
+        """
+        if self.values:
+            return dict((self(k) if type(k) is str else k, self._value(v)) for k, v in d.items())
+        return dict((self(k) if type(k) is str else k, v) for k, v in d.items())
+
+    def copy_list(self, lst):
+        """
+        Returns a copy of lst with interned values if they're enabled, or lst
+        itself, since it'll be copied anyway.
+        """
+        if self.values:
+            return [self._value(v) for v in lst]
+        return lst
+
+    def report(self):
+        return "%d distinct strings, %d of %d replaced, %.1f MiB saved" % (
+            len(self.table),
+            self.replaced,
+            self.lookups,
+            self.saved / 2.0 ** 20,
+        )
+
+    def __repr__(self):
+        return "Interner(%s)" % self.report()
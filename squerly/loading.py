@@ -0,0 +1,232 @@
+"""
+The loading module reads documents from many async byte streams at once, like
+sockets and pipes from collectors, and converts them into a List that can be
+queried while the rest are still loading.
+
+    loader = AsyncLoader()
+    loader.start([partial(asyncio.open_unix_connection, p) for p in sockets])
+    loader.queryable().find("image")  # whatever has loaded so far
+    loader.wait()
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+
+import yaml
+
+from .query import Index, List, _Queryable, json_loads, make_model
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "AsyncLoader",
+    "load_streams",
+]
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+_JSON_START = re.compile(rb"\s*[\[{]")
+
+_CHUNK = 1 << 16
+
+
+def parse_document(data):
+    """
+    Returns None if data can't be parsed or doesn't contain a dict or list.
+
+    Data that looks like a json object or array is parsed as json first,
+    since that's much faster. yaml is tried if that fails, since flow style
+    yaml can look like json too.
+    """
+    if _JSON_START.match(data):
+        try:
+            return json_loads(data)
+        except:
+            pass
+
+    try:
+        doc = yaml.load(data, Loader=_Loader)
+    except:
+        return None
+    return doc if isinstance(doc, (list, dict)) else None
+
+
+def _parse_file(path):
+    with open(path, "rb") as f:
+        return parse_document(f.read())
+
+
+async def _read(source):
+    """
+    Returns all the bytes from source. If it's a function, it's called for an
+    awaitable of the stream, which can be a (reader, writer) pair like
+    asyncio.open_connection returns. The writer is closed when the reader's
+    done.
+    """
+    if callable(source):
+        source = await source()
+    writer = None
+    if isinstance(source, tuple):
+        source, writer = source
+    try:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return bytes(source)
+        if hasattr(source, "read"):
+            chunks = []
+            while True:
+                chunk = await source.read(_CHUNK)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        else:
+            chunks = [chunk async for chunk in source]
+        return b"".join(chunks)
+    finally:
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except:
+                pass
+
+
+def _named(sources):
+    if isinstance(sources, dict):
+        return list(sources.items())
+    return [(s if isinstance(s, (str, os.PathLike)) else i, s) for i, s in enumerate(sources)]
+
+
+class AsyncLoader(object):
+    """
+    Loads one document from each of many sources concurrently. Each stream
+    is read on the event loop and parsed with parse_document in executor.
+    Documents are converted and appended to roots on the event loop as soon
+    as they're parsed, so roots is in the order they finish. Each one has a
+    source attribute with its name.
+
+    Sources can be paths, bytes-like objects, objects with an async read
+    method like asyncio.StreamReader, async iterables of bytes, or functions
+    that return an awaitable of a stream. Paths are read and parsed in
+    executor. Each stream is read to its end and holds one document, like a
+    file.
+
+    executor is the loop's default thread pool if it's None. A
+    ProcessPoolExecutor parses in parallel, but documents have to be pickled
+    back. limit is the most sources that are read at once. index, compact,
+    interner, and share are used like analyze uses them.
+
+    errors has a (name, exception) for each source that couldn't be loaded.
+
+    While start is loading in another thread, use queryable instead of
+    roots or index directly, since they change as documents are added.
+    """
+
+    def __init__(self, executor=None, limit=64, index=False, compact=False, interner=None, share=None):
+        if limit < 1:
+            raise ValueError("limit must be at least 1.")
+        self.executor = executor
+        self.limit = limit
+        self.compact = compact
+        self.interner = interner
+        self.share = share
+        self.index = Index() if index is True else (index or None)
+        self.roots = List()
+        if self.index is not None:
+            self.roots._index = self.index
+        self.errors = []
+        # Held while a document is added, so queryable sees whole documents
+        # and an index that matches them.
+        self._lock = threading.Lock()
+        self._thread = None
+        self._failure = None
+
+    def queryable(self):
+        """
+        Returns a queryable over the documents loaded so far. It has its own
+        copies of roots and the index, so it's safe to query while start is
+        still adding to them.
+        """
+        with self._lock:
+            roots = List(self.roots)
+            if self.index is not None:
+                roots._index = self.index.copy()
+        return _Queryable(roots)
+
+    def _add(self, name, doc):
+        with self._lock:
+            d = make_model(doc, index=self.index, compact=self.compact, interner=self.interner, share=self.share)
+            d.source = name
+            self.roots.append(d)
+
+    async def _load_one(self, name, source, semaphore):
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            try:
+                if isinstance(source, (str, os.PathLike)):
+                    doc = await loop.run_in_executor(self.executor, _parse_file, source)
+                else:
+                    data = await _read(source)
+                    doc = await loop.run_in_executor(self.executor, parse_document, data)
+            except Exception as ex:
+                log.debug("Couldn't load %s: %s", name, ex)
+                self.errors.append((name, ex))
+                return
+
+        if doc is None:
+            self.errors.append((name, ValueError("%s doesn't hold a yaml or json dict or list." % (name,))))
+        else:
+            self._add(name, doc)
+
+    async def load(self, sources):
+        """
+        Loads sources, a list or a dict of names to sources, and returns a
+        queryable over roots. Sources in a list are named by their path or
+        their position. It can be called again to add more.
+        """
+        semaphore = asyncio.Semaphore(self.limit)
+        await asyncio.gather(*(self._load_one(name, s, semaphore) for name, s in _named(sources)))
+        return self.queryable()
+
+    def start(self, sources):
+        """
+        Runs load in a new thread with its own event loop and returns right
+        away. queryable returns what has loaded so far, and wait blocks until
+        it's done.
+        """
+
+        def run():
+            try:
+                asyncio.run(self.load(sources))
+            except BaseException as ex:
+                self._failure = ex
+
+        self._failure = None
+        self._thread = threading.Thread(target=run, name="squerly-loader", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        """
+        Returns True if the load start began is done, or False if timeout
+        seconds passed first. Raises anything that stopped it.
+        """
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return False
+        if self._failure is not None:
+            raise self._failure
+        return True
+
+    def __repr__(self):
+        return "AsyncLoader(%d loaded, %d errors)" % (len(self.roots), len(self.errors))
+
+
+async def load_streams(sources, **kwargs):
+    """
+    Loads sources with a new AsyncLoader and returns a queryable over its
+    roots. kwargs are passed to AsyncLoader.
+    """
+    return await AsyncLoader(**kwargs).load(sources)
@@ -0,0 +1,161 @@
+"""
+The profiling module records what queries spend their time on. Nothing is
+recorded unless a Profile is active, and checking for one is the only cost
+otherwise.
+
+    with profile() as prof:
+        conf.find(("message", matches("Perm"))).upto("items")
+    print(prof)
+"""
+import time
+
+from contextlib import contextmanager
+from functools import wraps
+
+__all__ = [
+    "Profile",
+    "profile",
+]
+
+# The active Profile, if any.
+current = None
+
+
+class OpStats(object):
+    """
+    Totals for one kind of operation. Time is inclusive of any operations it
+    calls. Counts go to the innermost operation running when they happen.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.nodes = 0
+        self.predicates = 0
+        self.exceptions = 0
+
+
+class Profile(object):
+    def __init__(self):
+        self.ops = {}
+        self._stack = []
+
+    def _stats(self, name):
+        try:
+            return self.ops[name]
+        except KeyError:
+            stats = self.ops[name] = OpStats(name)
+            return stats
+
+    def _top(self):
+        return self._stack[-1] if self._stack else self._stats("(outside queries)")
+
+    def start(self, name):
+        self._stack.append(self._stats(name))
+        return time.perf_counter()
+
+    def stop(self, start):
+        stats = self._stack.pop()
+        stats.calls += 1
+        stats.seconds += time.perf_counter() - start
+
+    def visited(self, count=1):
+        self._top().nodes += count
+
+    def predicate(self):
+        self._top().predicates += 1
+
+    def exception(self):
+        self._top().exceptions += 1
+
+    def summary(self):
+        rows = sorted(self.ops.values(), key=lambda s: s.seconds, reverse=True)
+        lines = ["%-18s %7s %10s %10s %10s %11s %10s" % (
+            "operation", "calls", "seconds", "ms/call", "nodes", "predicates", "exceptions")]
+        for s in rows:
+            per_call = 1000.0 * s.seconds / s.calls if s.calls else 0.0
+            lines.append("%-18s %7d %10.4f %10.3f %10d %11d %10d" % (
+                s.name, s.calls, s.seconds, per_call, s.nodes, s.predicates, s.exceptions))
+        return "\n".join(lines)
+
+    __str__ = summary
+
+    def __repr__(self):
+        return self.summary()
+
+
+def enable():
+    """
+    Starts recording into a new Profile and returns it. Use this in an
+    interactive session where a with block is awkward.
+    """
+    global current
+    current = Profile()
+    return current
+
+
+def disable():
+    global current
+    prof, current = current, None
+    return prof
+
+
+@contextmanager
+def profile():
+    """
+    Records every query made inside the block into the Profile it yields.
+    """
+    global current
+    previous = current
+    current = Profile()
+    try:
+        yield current
+    finally:
+        current = previous
+
+
+def profiled(f):
+    """
+    Records calls to f as an operation named after it while a Profile is
+    active.
+    """
+    name = f.__name__.strip("_")
+
+    @wraps(f)
+    def inner(*args, **kwargs):
+        prof = current
+        if prof is None:
+            return f(*args, **kwargs)
+        start = prof.start(name)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            prof.stop(start)
+
+    return inner
+
+
+def counted(pred):
+    """
+    Wraps a desugared query so each evaluation is counted.
+    """
+    prof = current
+
+    def inner(node):
+        prof.predicate()
+        return pred(node)
+
+    return inner
+
+
+def swallowed():
+    prof = current
+    if prof is not None:
+        prof.exception()
+
+
+def visited(count):
+    prof = current
+    if prof is not None:
+        prof.visited(count)
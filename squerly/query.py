@@ -1,17 +1,45 @@
-import re
+import gc
+import heapq
 import yaml
 from collections import Counter
-
-from .boolean import Boolean, pred
+from contextlib import contextmanager
+from functools import lru_cache
+
+from . import profiling
+from .aggregate import HyperLogLog, SpaceSaving
+from .rendering import RenderOptions, Rendered, _BaseDumper, _Dumper, dump, render, render_options
+from .boolean import (
+    UNKNOWN,
+    Boolean,
+    Predicate,
+    _Adaptive,
+    _Sequence,
+    compile_pattern,
+    cost,
+    eq,
+    equality_values,
+    optimize,
+    pred,
+)
 
 __all__ = [
     "ANY",
+    "CompactDict",
+    "CompactList",
     "Dict",
+    "Index",
+    "LazyDict",
+    "LazyList",
     "List",
     "Result",
+    "Path",
+    "SharedDict",
+    "SharedList",
     "Queryable",
+    "compile_path",
     "convert",
     "from_dict",
+    "from_json",
     "from_yaml",
     "make_child_query",
     "make_model",
@@ -19,12 +47,15 @@ __all__ = [
 ]
 
 _Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
-_BaseDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
-
 
-class _Dumper(_BaseDumper):
-    def ignore_aliases(self, *args):
-        return True
+# Use the fastest json parser that's installed. They all take bytes or str.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    try:
+        from ujson import loads as json_loads
+    except ImportError:
+        from json import loads as json_loads
 
 
 ANY = None
@@ -35,6 +66,8 @@ class _Base(object):
     Base class for primitive Dicts and Lists we'll use to build models.
     """
 
+    __slots__ = ()
+
     def __init__(self, data=None, parent=None):
         if data is not None:
             super(_Base, self).__init__(data)
@@ -55,38 +88,392 @@ class Dict(_Base, dict):
 
 
 class List(_Base, list):
-    pass
+    # The trail of each item when it's a query result with shared nodes in
+    # it. See _Trail.
+    _trails = None
+
+
+class _CompactBase(_Base):
+    """
+    Nodes for compact models. They keep their parent in a slot and hash by
+    identity without storing it, so they don't carry an instance __dict__.
+    That means they can't have other attributes, like source, set on them.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, data=None, parent=None):
+        if data is not None:
+            super(_Base, self).__init__(data)
+        else:
+            super(_Base, self).__init__()
+        self.parent = parent
+
+    __hash__ = object.__hash__
+
+
+class CompactDict(_CompactBase, dict):
+    __slots__ = ("parent",)
+
+
+class CompactList(_CompactBase, list):
+    __slots__ = ("parent",)
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("Shared nodes can't be changed.")
+
+
+class _SharedBase(_Base):
+    """
+    Nodes for models built with a SubtreeTable. Identical subtrees are stored
+    once, so a node can be under many parents. parent is the first one it was
+    added to, and parents has all of them. Like compact nodes they keep those
+    in slots, and they can't be changed, since a change would show up under
+    every parent.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, data=None, parent=None):
+        if data is not None:
+            super(_Base, self).__init__(data)
+        else:
+            super(_Base, self).__init__()
+        self.parent = parent
+        self._others = None
+
+    __hash__ = object.__hash__
+
+    @property
+    def parents(self):
+        if self._others is None:
+            return [] if self.parent is None else [self.parent]
+        return [self.parent] + self._others
+
+    def _add_parent(self, parent):
+        if self.parent is None:
+            self.parent = parent
+        elif self._others is None:
+            self._others = [parent]
+        else:
+            self._others.append(parent)
+
+    def _remove_parent(self, parent):
+        parents = self.parents
+        for i, p in enumerate(parents):
+            if p is parent:
+                del parents[i]
+                break
+        self.parent = parents[0] if parents else None
+        self._others = parents[1:] or None
+
+    def __reduce__(self):
+        # By default pickle fills them in with __setitem__ or append, which
+        # are disabled.
+        return (type(self), (), (self._items(), self.parent, self._others))
+
+
+class SharedDict(_SharedBase, dict):
+    __slots__ = ("parent", "_others")
+
+    def _items(self):
+        return dict(self)
+
+    def __setstate__(self, state):
+        items, self.parent, self._others = state
+        dict.update(self, items)
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+class SharedList(_SharedBase, list):
+    __slots__ = ("parent", "_others")
+
+    def _items(self):
+        return list(self)
+
+    def __setstate__(self, state):
+        items, self.parent, self._others = state
+        list.extend(self, items)
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+
+def _parents_of(node):
+    if isinstance(node, _SharedBase):
+        return node.parents
+    return [] if node.parent is None else [node.parent]
+
+
+class _Trail(object):
+    """
+    The way a query came down to a node, for nodes under shared ones that
+    have more than one parent. node is the parent it came through, and up is
+    node's own trail, or None if node's parents are all there is to follow.
+    parents, roots, and upto walk back up trails, so they lead to the
+    documents a match was found in instead of every document that shares it.
+
+    Results and Lists from queries keep the trails of their items in
+    _trails, next to them. Models without shared nodes don't need any.
+    """
+
+    __slots__ = ("node", "up")
+
+    def __init__(self, node, up):
+        self.node = node
+        self.up = up
+
+    # Trails are compared by the nodes along them. They're as long as
+    # documents are deep, so that's done without recursing.
+    def __hash__(self):
+        h = 0
+        t = self
+        while t is not None:
+            h = hash((h, id(t.node)))
+            t = t.up
+        return h
+
+    def __eq__(self, other):
+        a, b = self, other
+        while a is not b:
+            if a is None or b is None or a.node is not b.node:
+                return False
+            a, b = a.up, b.up
+        return True
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def _descend(holder, trail, child, lasting=False):
+    """
+    Returns the trail of child when it's reached from holder, whose trail is
+    trail. holder is one of child's parents or a Dict a query returned, whose
+    parent holds child.
+
+    Shared nodes with one parent don't need a trail yet, but they will once
+    another document shares them. If lasting is True, like for an Index,
+    they get one anyway.
+    """
+    if trail is None and (not isinstance(child, _SharedBase) or (child._others is None and not lasting)):
+        # There's only one way up.
+        return None
+    if not isinstance(child, _Base):
+        return None
+    if child.parent is holder or isinstance(holder, _SharedBase) or holder.parent is None:
+        return _Trail(holder, trail)
+    # holder is a query's Dict. trail, or its parent, is the way up.
+    return trail if trail is not None else _Trail(holder.parent, None)
+
+
+def _up(node, trail):
+    """
+    Returns a (parent, trail) pair for each way up from node.
+    """
+    if trail is not None:
+        return [(trail.node, trail.up)]
+    return [(p, None) for p in _parents_of(node)]
+
+
+def _parent_dicts(node, trail=None):
+    """
+    Returns (Dict, trail) pairs for the Dicts right above node, skipping a
+    List between them. Shared nodes can have more than one.
+    """
+    res = []
+    for p, t in _up(node, trail):
+        res.extend(_up(p, t) if isinstance(p, list) else [(p, t)])
+    return res
+
+
+def _traced(value, trail=None):
+    """
+    Returns (item, trail) pairs for the items of a List or Result. They're
+    the trails recorded with a query's result, or the ones for items of a
+    model's List whose own trail is trail.
+    """
+    trails = getattr(value, "_trails", None)
+    if trails is not None and len(trails) == list.__len__(value):
+        return zip(value, trails)
+    if isinstance(value, Result):
+        return ((v, None) for v in value)
+    if trail is None:
+        return ((v, _descend(value, None, v) if isinstance(v, _SharedBase) else None) for v in value)
+    return ((v, _descend(value, trail, v)) for v in value)
+
+
+def _grandchildren(value):
+    """
+    Like Result.grandchildren, but it yields (child, trail) pairs.
+    """
+    for w, t in _traced(value):
+        for c in _children(w):
+            if t is None and not isinstance(c, _SharedBase):
+                yield c, None
+            else:
+                yield c, _descend(w, t, c)
+
+
+def _note(res, trail, item):
+    """
+    Records trail for item, which was just appended to res. Nothing is
+    recorded until there's a trail or a shared node to keep, so results from
+    models without shared nodes don't carry a list of trails.
+    """
+    trails = res._trails
+    if trails is None:
+        if trail is None and not isinstance(item, _SharedBase):
+            return
+        trails = res._trails = [None] * (list.__len__(res) - 1)
+    trails.append(trail)
+
+
+def _lazy(value, parent):
+    if isinstance(value, _Base):
+        return value
+    if isinstance(value, dict):
+        return LazyDict(value, parent=parent)
+    if isinstance(value, list):
+        return LazyList(value, parent=parent)
+    return value
+
+
+class LazyDict(Dict):
+    """
+    A Dict that holds its raw children and converts each dict or list the
+    first time it's accessed, so only the parts of a document that are
+    queried are ever copied into the model. Converted children replace the
+    raw ones, so they're only converted once.
+    """
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, (dict, list)) and not isinstance(value, _Base):
+            value = _lazy(value, self)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def _convert(self):
+        if not self.__dict__.get("_converted"):
+            for k, v in dict.items(self):
+                if isinstance(v, (dict, list)) and not isinstance(v, _Base):
+                    dict.__setitem__(self, k, _lazy(v, self))
+            self._converted = True
+
+    def values(self):
+        self._convert()
+        return dict.values(self)
+
+    def items(self):
+        self._convert()
+        return dict.items(self)
+
+
+class LazyList(List):
+    """
+    A List that converts its raw dict and list items the first time it's
+    indexed or iterated.
+    """
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            self._convert()
+            return list.__getitem__(self, i)
+        value = list.__getitem__(self, i)
+        if isinstance(value, (dict, list)) and not isinstance(value, _Base):
+            value = _lazy(value, self)
+            list.__setitem__(self, i, value)
+        return value
+
+    def _convert(self):
+        if not self.__dict__.get("_converted"):
+            for i, v in enumerate(list.__iter__(self)):
+                if isinstance(v, (dict, list)) and not isinstance(v, _Base):
+                    list.__setitem__(self, i, _lazy(v, self))
+            self._converted = True
+
+    def __iter__(self):
+        self._convert()
+        return list.__iter__(self)
+
+
+_DICTS = (Dict, CompactDict, SharedDict)
+_LISTS = (List, CompactList, SharedList)
+_NODES = _DICTS + _LISTS
+
+
+def _invalidates(method):
+    def inner(self, *args, **kwargs):
+        self._count = None
+        return method(self, *args, **kwargs)
+
+    inner.__name__ = method.__name__
+    return inner
 
 
 class Result(list):
     """
     Contains primitives, Dicts, or Lists.
+
+    Its length is the number of values it contains. That's counted the first
+    time it's needed and cached until the Result itself is changed. Changes to
+    the Dicts and Lists it contains aren't tracked.
     """
 
+    __slots__ = ("_count", "_trails")
+
+    def __init__(self, *args):
+        super(Result, self).__init__(*args)
+        self._count = None
+        self._trails = None
+
     def __len__(self):
-        return len(list(self.values))
+        if self._count is None:
+            count = 0
+            for _ in self.values:
+                count += 1
+            self._count = count
+        return self._count
 
     def __bool__(self):
-        try:
-            next(self.values)
+        if self._count is not None:
+            return self._count > 0
+        for _ in self.values:
             return True
-        except:
-            return False
+        self._count = 0
+        return False
+
+    append = _invalidates(list.append)
+    extend = _invalidates(list.extend)
+    insert = _invalidates(list.insert)
+    pop = _invalidates(list.pop)
+    remove = _invalidates(list.remove)
+    clear = _invalidates(list.clear)
+    __setitem__ = _invalidates(list.__setitem__)
+    __delitem__ = _invalidates(list.__delitem__)
+    __iadd__ = _invalidates(list.__iadd__)
+    __imul__ = _invalidates(list.__imul__)
 
     @property
     def grandchildren(self):
         for v in self:
-            if isinstance(v, Dict):
+            if isinstance(v, _DICTS):
                 for i in v.values():
                     yield i
-            elif isinstance(v, List):
+            elif isinstance(v, _LISTS):
                 for i in v:
                     yield i
 
     @property
     def values(self):
         for v in self.grandchildren:
-            if isinstance(v, List):
+            if isinstance(v, _LISTS):
                 for i in v:
                     yield i
             else:
@@ -94,6 +481,8 @@ class Result(list):
 
 
 class WhereBoolean(object):
+    cost = UNKNOWN
+
     def __and__(self, other):
         return WhereAnd(self, other)
 
@@ -106,32 +495,88 @@ class WhereBoolean(object):
     def test(self, value):
         raise NotImplementedError()
 
+    def optimize(self, adaptive=False):
+        """
+        Returns an equivalent WhereBoolean that's cheaper to evaluate. See
+        boolean.optimize.
+        """
+        return self
+
+
+def _where_operands(w, kind):
+    for side in (w.left, w.right):
+        if isinstance(side, kind):
+            for i in _where_operands(side, kind):
+                yield i
+        else:
+            yield side
+
 
 class WhereAnd(WhereBoolean):
     def __init__(self, left, right):
         self.left = left
         self.right = right
 
+    @property
+    def cost(self):
+        return self.left.cost + self.right.cost
+
     def test(self, value):
         return self.left.test(value) and self.right.test(value)
 
+    def optimize(self, adaptive=False):
+        operands = [o.optimize(adaptive) for o in _where_operands(self, WhereAnd)]
+        return _WhereSequence(operands, True, adaptive)
+
 
 class WhereOr(WhereBoolean):
     def __init__(self, left, right):
         self.left = left
         self.right = right
 
+    @property
+    def cost(self):
+        return self.left.cost + self.right.cost
+
     def test(self, value):
         return self.left.test(value) or self.right.test(value)
 
+    def optimize(self, adaptive=False):
+        operands = [o.optimize(adaptive) for o in _where_operands(self, WhereOr)]
+        return _WhereSequence(operands, False, adaptive)
+
 
 class WhereNot(WhereBoolean):
     def __init__(self, delegate):
         self.delegate = delegate
 
+    @property
+    def cost(self):
+        return self.delegate.cost
+
     def test(self, value):
         return not self.delegate.test(value)
 
+    def optimize(self, adaptive=False):
+        if isinstance(self.delegate, WhereNot):
+            return self.delegate.delegate.optimize(adaptive)
+        return WhereNot(self.delegate.optimize(adaptive))
+
+
+class _WhereSequence(WhereBoolean):
+    """
+    A flattened chain of WhereAnds or WhereOrs whose operands are tested in
+    order of cost.
+    """
+
+    def __init__(self, operands, conjunction, adaptive=False):
+        kind = _Adaptive if adaptive else _Sequence
+        self.sequence = kind(operands, conjunction)
+        self.cost = self.sequence.cost
+
+    def test(self, value):
+        return self.sequence.test(value)
+
 
 class WherePred(WhereBoolean):
     def __init__(self, pred):
@@ -141,6 +586,7 @@ class WherePred(WhereBoolean):
         try:
             return bool(self.pred(value))
         except:
+            profiling.swallowed()
             return False
 
 
@@ -149,17 +595,37 @@ class WhereQuery(WherePred):
         super(WhereQuery, self).__init__(
             _desugar(name if value is None else (name, value))
         )
+        self.cost = cost(name) + (0 if value is None else cost(value))
 
 
 make_child_query = WhereQuery
 q = WhereQuery
 
 
+_SCALARS = (str, bytes, int, float, bool, type(None))
+
+
 def _desugar(query):
     """
     returns a function that accepts a dict and returns a dict of all name
     value pairs from it that match the query.
+
+    Queries made only of scalars, like names and (name, value) tuples, are
+    cached so repeated queries reuse the same function.
     """
+    if isinstance(query, _SCALARS) or (
+        isinstance(query, tuple)
+        and len(query) == 2
+        and isinstance(query[0], _SCALARS)
+        and isinstance(query[1], _SCALARS)
+    ):
+        pred = _cached_desugar(query)
+    else:
+        pred = _build_desugar(query)
+    return pred if profiling.current is None else profiling.counted(pred)
+
+
+def _build_desugar(query):
     if isinstance(query, tuple):
         name, value = query
         if callable(name):
@@ -168,6 +634,11 @@ def _desugar(query):
         if callable(value):
             value = pred(value)
 
+        if isinstance(name, Boolean):
+            name = optimize(name)
+        if isinstance(value, Boolean):
+            value = optimize(value)
+
         if isinstance(name, Boolean) and isinstance(value, Boolean):
 
             def inner(node):
@@ -205,6 +676,7 @@ def _desugar(query):
                             return Dict({name: v}, parent=node)
                         return Dict({}, parent=node)
                     except:
+                        profiling.swallowed()
                         return Dict({}, parent=node)
 
         else:
@@ -216,6 +688,7 @@ def _desugar(query):
                         return Dict({name: v}, parent=node)
                     return Dict({}, parent=node)
                 except:
+                    profiling.swallowed()
                     return Dict({}, parent=node)
 
     elif query is ANY:
@@ -224,6 +697,7 @@ def _desugar(query):
             return node
 
     elif isinstance(query, Boolean):
+        query = optimize(query)
 
         def inner(node):
             res = {}
@@ -241,7 +715,7 @@ def _desugar(query):
                     if query(k):
                         res[k] = v
                 except:
-                    pass
+                    profiling.swallowed()
             return Dict(res, parent=node)
 
     else:
@@ -250,44 +724,307 @@ def _desugar(query):
             try:
                 return Dict({query: node[query]}, parent=node)
             except:
+                profiling.swallowed()
                 return Dict({}, parent=node)
 
     return inner
 
 
-def _query(pred, value):
-    if isinstance(value, Dict):
-        res = pred(value)
-        return Result([res] if res else [])
+_cached_desugar = lru_cache(maxsize=1024, typed=True)(_build_desugar)
+
+
+def _extend(res, result):
+    """
+    list.extend asks a Result for its length first, and that counts all of
+    its values. Its iterator reports the number of items instead. Trails are
+    kept with the items.
+    """
+    if res._trails is None and result._trails is None:
+        res.extend(iter(result))
+        return
+    for v, t in _traced(result):
+        res.append(v)
+        _note(res, t, v)
+
+
+def _children(node):
+    if isinstance(node, _DICTS):
+        return node.values()
+    if isinstance(node, _LISTS):
+        return node
+    return ()
+
+
+def _found(res, r, node, trail):
+    """
+    Appends r, what a query returned for node, to res. It's node itself or a
+    Dict whose parent is node.
+    """
+    res.append(r)
+    if trail is not None or res._trails is not None:
+        _note(res, trail if r is node or trail is None else _Trail(node, trail), r)
+
+
+def _query(pred, value, trail=None):
+    """
+    Runs pred against value like a query does. trail is value's trail when
+    it's a node. See _Trail.
+    """
+    if isinstance(value, _DICTS):
+        res = Result()
+        r = pred(value)
+        if r:
+            _found(res, r, value, trail)
+        return res
 
-    if isinstance(value, List):
+    if isinstance(value, _LISTS):
         res = Result()
-        for v in value:
+        if trail is None and getattr(value, "_trails", None) is None:
+            # Items only need trails if they're shared.
+            for v in value:
+                r = pred(v)
+                if r:
+                    if res._trails is None and not isinstance(v, _SharedBase):
+                        res.append(r)
+                    else:
+                        _found(res, r, v, _descend(value, None, v))
+            return res
+        for v, t in _traced(value, trail):
             r = pred(v)
             if r:
-                res.append(r)
+                _found(res, r, v, t)
         return res
 
     if isinstance(value, Result):
         res = Result()
-        for c in value.grandchildren:
-            res.extend(_query(pred, c))
+        for c, t in _grandchildren(value):
+            _extend(res, _query(pred, c, t))
         return res
     return Result()
 
 
 def _flatten(obj):
-    if isinstance(obj, Dict):
-        yield obj
-        for v in obj.values():
-            for i in _flatten(v):
-                yield i
-    elif isinstance(obj, (List, Result)):
-        for v in obj:
-            for i in _flatten(v):
-                yield i
+    """
+    Yields every Dict and primitive under obj in pre-order. Lists aren't
+    yielded, only what's in them. It keeps a stack of iterators instead of
+    recursing, so deep documents don't need deep call stacks.
+    """
+    containers = _LISTS + (Result,)
+    stack = [iter((obj,))]
+    while stack:
+        for v in stack[-1]:
+            if isinstance(v, _DICTS):
+                yield v
+                stack.append(iter(v.values()))
+                break
+            elif isinstance(v, containers):
+                stack.append(iter(v))
+                break
+            else:
+                yield v
+        else:
+            stack.pop()
+
+
+def _flatten_traced(obj, lasting=False):
+    """
+    Like _flatten, but it yields (node, trail) pairs, so what's found under
+    shared nodes can be followed back up the way it was reached. lasting is
+    passed to _descend.
+    """
+    containers = _LISTS + (Result,)
+    if lasting and isinstance(obj, _LISTS):
+        top = ((v, _descend(obj, None, v, True)) for v in obj)
+    elif isinstance(obj, containers):
+        top = _traced(obj)
     else:
-        yield obj
+        top = [(obj, None)]
+    for v, t in top:
+        if isinstance(v, _DICTS):
+            yield v, t
+            stack = [(iter(v.values()), v, t)]
+        elif isinstance(v, containers):
+            stack = [(iter(v), v, t)]
+        else:
+            yield v, t
+            continue
+
+        # Iterators over the children of holder, whose trail is trail.
+        while stack:
+            items, holder, trail = stack[-1]
+            for v in items:
+                if trail is None and not isinstance(v, _SharedBase):
+                    t = None
+                else:
+                    t = _descend(holder, trail, v, lasting)
+                if isinstance(v, _DICTS):
+                    yield v, t
+                    stack.append((iter(v.values()), v, t))
+                    break
+                elif isinstance(v, containers):
+                    stack.append((iter(v), v, t))
+                    break
+                else:
+                    yield v, t
+            else:
+                stack.pop()
+
+
+class Index(object):
+    """
+    Maps each key name to the Dicts that contain it, in the order find would
+    visit them. make_model fills one in when it's given one, and Queryable
+    attaches it to the model so find, query, and where can use it.
+
+    Equality lookups use a second map from a name's values to positions in
+    its owners list. It's built for a name the first time it's needed.
+
+    In models with shared nodes, trails has the trail of each owner of a
+    name, next to them, so matches found through the index lead back to the
+    right documents. See _Trail.
+    """
+
+    def __init__(self):
+        self.by_key = {}
+        self.by_value = {}
+        self.trails = {}
+
+    @classmethod
+    def build(cls, obj):
+        index = cls()
+        index.rebuild(obj)
+        return index
+
+    def rebuild(self, obj):
+        """
+        Replaces everything in the index with the Dicts in obj. Models the
+        index is attached to keep using it.
+        """
+        self.by_key.clear()
+        self.by_value.clear()
+        self.trails.clear()
+        for node, trail in _flatten_traced(obj, lasting=True):
+            if isinstance(node, _DICTS):
+                self.add(node, trail=trail)
+
+    def copy(self):
+        """
+        Returns an Index with copies of the owner lists, so adding to either
+        one doesn't change the other.
+        """
+        index = Index()
+        index.by_key = dict((k, list(v)) for k, v in self.by_key.items())
+        index.trails = dict((k, list(v)) for k, v in self.trails.items())
+        return index
+
+    def add(self, node, keys=None, trail=None):
+        by_key = self.by_key
+        all_trails = self.trails
+        for k in node if keys is None else keys:
+            try:
+                owners = by_key[k]
+                owners.append(node)
+            except KeyError:
+                owners = by_key[k] = [node]
+            if trail is not None or (all_trails and k in all_trails):
+                trails = all_trails.get(k)
+                if trails is None:
+                    trails = all_trails[k] = [None] * (len(owners) - 1)
+                trails.append(trail)
+            self.by_value.pop(k, None)
+
+    def owners(self, name):
+        return self.by_key.get(name, [])
+
+    def _positions(self, name):
+        positions = self.by_value.get(name)
+        if positions is None:
+            positions = {}
+            for i, node in enumerate(self.owners(name)):
+                v = node[name]
+                if isinstance(v, _Base):
+                    continue
+                try:
+                    positions[v].append(i)
+                except KeyError:
+                    positions[v] = [i]
+                except TypeError:
+                    pass
+            self.by_value[name] = positions
+        return positions
+
+    def _positions_with(self, name, values):
+        positions = self._positions(name)
+        found = [positions[v] for v in values if v in positions]
+        if len(found) == 1:
+            return found[0]
+        return sorted(set(i for f in found for i in f))
+
+    def owners_with(self, name, values):
+        """
+        Returns the Dicts whose name key equals one of values, in find order.
+        """
+        owners = self.owners(name)
+        return [owners[i] for i in self._positions_with(name, values)]
+
+    def __contains__(self, name):
+        return name in self.by_key
+
+    def __len__(self):
+        return len(self.by_key)
+
+
+def _get_index(obj):
+    if isinstance(obj, _NODES):
+        return getattr(obj, "_index", None)
+
+
+def _index_name(query):
+    """
+    Returns the key name a query needs if it's a plain name or a (name, value)
+    tuple with a plain name. Returns ANY otherwise.
+    """
+    if isinstance(query, tuple):
+        query = query[0]
+    if query is ANY or isinstance(query, (Boolean, WhereBoolean, tuple)) or callable(query):
+        return ANY
+    try:
+        hash(query)
+    except TypeError:
+        return ANY
+    return query
+
+
+def _equality_values(value):
+    if isinstance(value, Boolean):
+        return equality_values(value)
+    if callable(value):
+        return None
+    try:
+        return set([value])
+    except TypeError:
+        return None
+
+
+def _index_owners(index, query):
+    """
+    Returns the Dicts in index that could match query and their trails, or
+    None for the trails if they don't have any. Returns (None, None) if the
+    index can't narrow it down.
+    """
+    name = _index_name(query)
+    if name is ANY:
+        return None, None
+    owners = index.owners(name)
+    trails = index.trails.get(name)
+    if isinstance(query, tuple):
+        values = _equality_values(query[1])
+        if values is not None:
+            positions = index._positions_with(name, values)
+            owners = [owners[i] for i in positions]
+            if trails is not None:
+                trails = [trails[i] for i in positions]
+    return owners, trails
 
 
 def _ancestors(node):
@@ -297,22 +1034,141 @@ def _ancestors(node):
         p = p.parent
 
 
-def _ancestor_dicts(node):
+class Path(object):
     """
-    Travel up parents yielding each one that is a dictionary.
+    A chain of plain key queries fused into one traversal.
+
+    compile_path("status.nodeStatuses")(conf) returns the same thing as
+    conf.status.nodeStatuses, but it doesn't create a Result or the Dicts that
+    hold each match for the steps in between. Keys that are ints or strings of
+    digits index into lists, so "spec.containers.0.image" is the first
+    container's image.
     """
-    for a in _ancestors(node):
-        if not isinstance(a, list):
-            yield a
 
+    def __init__(self, keys):
+        if not keys:
+            raise ValueError("A path needs at least one key.")
+        self.keys = tuple(keys)
+
+    def evaluate(self, value):
+        """
+        Runs the path against a Dict, List, or Result and returns a Result.
+        """
+        if isinstance(value, Result):
+            nodes = list(_grandchildren(value))
+        elif isinstance(value, _NODES):
+            nodes = [(value, None)]
+        else:
+            return Result()
 
-def _ancestor_pairs(node):
-    ps = _ancestor_dicts(node)
-    gps = _ancestor_dicts(node)
-    next(gps)
-    for g in gps:
-        p = next(ps)
-        yield (g, p)
+        for key in self.keys[:-1]:
+            nodes = list(_follow(nodes, key))
+
+        last = self.keys[-1]
+        res = Result()
+        for node, k, trail in _owners(nodes, last):
+            _found(res, Dict({last: node[k]}, parent=node), node, trail)
+        return res
+
+    def __call__(self, value):
+        if isinstance(value, _Queryable):
+            value = value._value
+        return _Queryable(self.evaluate(value))
+
+    def __repr__(self):
+        return "Path(%r)" % (self.keys,)
+
+
+def _position(key):
+    """
+    Returns key as a list position if it's an int or a string of digits, like
+    the parts of "containers.0.ports", or None.
+    """
+    if isinstance(key, int) and not isinstance(key, bool):
+        return key
+    if isinstance(key, str) and key.isdigit():
+        return int(key)
+    return None
+
+
+def _owners(nodes, key):
+    """
+    Yields (node, k, trail) for the Dicts among nodes, or directly inside
+    Lists among nodes, that contain key, which is what a name query matches.
+    If key is a position, Lists among nodes are indexed with it instead, so
+    lists inside lists can be reached too. nodes are (node, trail) pairs.
+    """
+    position = _position(key)
+    for node, trail in nodes:
+        if isinstance(node, _DICTS):
+            if key in node:
+                yield node, key, trail
+        elif isinstance(node, _LISTS):
+            if position is not None:
+                if -len(node) <= position < len(node):
+                    yield node, position, trail
+                continue
+            for i in node:
+                if isinstance(i, _DICTS) and key in i:
+                    yield i, key, _descend(node, trail, i)
+
+
+def _follow(nodes, key):
+    for node, k, trail in _owners(nodes, key):
+        v = node[k]
+        yield v, _descend(node, trail, v)
+
+
+def _field(node, keys, start=0):
+    """
+    Returns the value at keys under node, or None if it isn't there. Lists
+    along the way are searched like a query would, so the result is a list of
+    what's found under their members.
+    """
+    for i in range(start, len(keys)):
+        if isinstance(node, _DICTS):
+            try:
+                node = node[keys[i]]
+            except KeyError:
+                return None
+        elif isinstance(node, _LISTS):
+            res = []
+            for n in node:
+                v = _field(n, keys, i)
+                if v is not None:
+                    res.append(v)
+            return res or None
+        else:
+            return None
+    return node
+
+
+def _frozen(value):
+    """
+    Returns a hashable copy of value. Lists become tuples, and dicts become
+    tuples of their (key, value) pairs, sorted by key when the keys can be.
+    """
+    if isinstance(value, dict):
+        items = [(k, _frozen(v)) for k, v in value.items()]
+        try:
+            items.sort(key=lambda i: i[0])
+        except TypeError:
+            pass
+        return tuple(items)
+    if isinstance(value, list):
+        return tuple(_frozen(v) for v in value)
+    return value
+
+
+@lru_cache(maxsize=1024)
+def compile_path(path):
+    """
+    Returns a Path for a dotted string like "status.nodeStatuses" or a tuple
+    of keys, which allows keys that contain dots. Paths are cached, so
+    compiling the same one again is cheap.
+    """
+    keys = path.split(".") if isinstance(path, str) else path
+    return Path(keys)
 
 
 class _Queryable:
@@ -321,9 +1177,10 @@ class _Queryable:
     def __init__(self, value):
         self._value = value
 
+    @profiling.profiled
     def keys(self):
         obj = self._value
-        if isinstance(obj, Dict):
+        if isinstance(obj, _DICTS):
             return sorted(set(obj.keys()))
 
         if isinstance(obj, Result):
@@ -338,44 +1195,75 @@ class _Queryable:
                     for v in i:
                         res |= set(v.keys())
                 except:
-                    pass
+                    profiling.swallowed()
         return sorted(res)
 
     get_keys = keys
 
     @property
+    @profiling.profiled
     def parents(self):
-        value = self._value if isinstance(self._value, list) else self._value
+        value = _traced(self._value) if isinstance(self._value, list) else [(self._value, None)]
+        # A shared Dict is kept once for each way down to it, like the
+        # separate Dicts it stands for.
         seen = set()
         res = List()
-        for v in value:
-            p = v.parent
-            if isinstance(p, list):
-                p = p.parent
-            if p is not None and p not in seen:
-                seen.add(p)
-                res.append(p)
+        for v, t in value:
+            if t is not None or isinstance(v, _SharedBase) or isinstance(v.parent, _SharedBase):
+                found = _parent_dicts(v, t)
+            else:
+                p = v.parent
+                if isinstance(p, list):
+                    p = p.parent
+                found = () if p is None else ((p, None),)
+            for p, t in found:
+                key = p if t is None else (p, t)
+                if key not in seen:
+                    seen.add(key)
+                    res.append(p)
+                    _note(res, t, p)
         return _Queryable(res)
 
     @property
+    @profiling.profiled
     def roots(self):
-        value = self._value if isinstance(self._value, list) else [self._value]
+        value = _traced(self._value) if isinstance(self._value, list) else [(self._value, None)]
         res = List()
         seen = set()
-        for v in value:
-            p = v
-            while p.parent is not None:
-                p = p.parent
-            if p is not None and p not in seen:
-                res.append(p)
-                seen.add(p)
+        # Trails lead back up the way a match was found. Shared nodes without
+        # one can have more than one parent, so every path up from them is
+        # followed. Ones that were already walked lead to roots that were
+        # already found.
+        walked = set()
+        for v, t in value:
+            stack = [(v, t)]
+            while stack:
+                p, t = stack.pop()
+                while True:
+                    if t is not None:
+                        p, t = t.node, t.up
+                        continue
+                    if p.parent is None:
+                        break
+                    if isinstance(p, _SharedBase) and p._others is not None:
+                        if p in walked:
+                            p = None
+                            break
+                        walked.add(p)
+                        stack.extend((o, None) for o in reversed(p._others))
+                    p = p.parent
+                if p is not None and p not in seen:
+                    res.append(p)
+                    seen.add(p)
         return _Queryable(res)
 
     @property
+    @profiling.profiled
     def unique_values(self):
         return sorted(set(self._value.values))
 
     @property
+    @profiling.profiled
     def values(self):
         return list(self._value.values)
 
@@ -385,34 +1273,93 @@ class _Queryable:
         assert len(v) == 1
         return v[0]
 
+    @profiling.profiled
     def query(self, pred):
+        index = _get_index(self._value)
+        if index is not None:
+            name = _index_name(pred)
+            if name is not ANY and name not in index:
+                return _Queryable(Result())
+
         pred = _desugar(pred)
         return _Queryable(_query(pred, self._value))
 
+    @profiling.profiled
     def upto(self, pred):
+        """
+        Returns the Dicts above each value that sit under a key of their parent
+        Dict that matches pred. Lists between Dicts are skipped.
+        """
         pred = _desugar(pred)
-        value = self._value if isinstance(self._value, list) else [self._value]
+        value = _traced(self._value) if isinstance(self._value, list) else [(self._value, None)]
+
+        # The children of each ancestor that pred matches. Values often share
+        # ancestors, so each one is only queried once.
+        matched = {}
+
+        # Dict ancestors whose own ancestors have already been checked.
+        # Everything above one of them was handled by an earlier value.
+        walked = set()
 
+        # Like parents, a shared Dict is kept once for each way down to it.
         seen = set()
         res = List()
-        for v in value:
-            for gp, p in _ancestor_pairs(v):
-                r = _query(pred, gp)
-                if r and p not in seen:
-                    if set(_ancestors(v)) & set(r.grandchildren):
-                        seen.add(p)
-                        res.append(p)
+        visited = 0
+        for v, t in value:
+            # Ancestors are walked along trails, or every path up from shared
+            # nodes without one. Paths that branch off are walked later,
+            # starting from (ancestor, its trail, p, p's trail, below).
+            stack = [(a, at, None, None, None) for a, at in reversed(_up(v, t))]
+            while stack:
+                a, at, p, pt, below = stack.pop()
+                while True:
+                    if not isinstance(a, list):
+                        key = p if pt is None else (p, pt)
+                        if p is not None and key not in seen:
+                            try:
+                                children = matched[a]
+                            except KeyError:
+                                children = matched[a] = set(
+                                    c for c in _query(pred, a).grandchildren if isinstance(c, _Base)
+                                )
+                            if below in children:
+                                seen.add(key)
+                                res.append(p)
+                                _note(res, pt, p)
+                        # Only the ancestors of nodes without trails are the
+                        # same for every path through them.
+                        if at is None:
+                            if a in walked:
+                                break
+                            walked.add(a)
+                        p, pt = a, at
+                    if at is not None:
+                        up, ut = at.node, at.up
+                    else:
+                        up, ut = a.parent, None
+                        if isinstance(a, _SharedBase) and a._others is not None:
+                            stack.extend((o, None, p, pt, a) for o in reversed(a._others))
+                    visited += 1
+                    if up is None:
+                        break
+                    below = a
+                    a, at = up, ut
+        profiling.visited(visited)
         return _Queryable(res)
 
+    @profiling.profiled
     def find(self, first, *rest):
+        index = _get_index(self._value)
+        owners, trails = (None, None) if index is None else _index_owners(index, first)
+
         first = _desugar(first)
         queries = [_desugar(arg) for arg in rest]
 
-        def match(node):
-            if not isinstance(node, (Dict, List, Result)):
+        def match(node, trail):
+            if not isinstance(node, _NODES + (Result,)):
                 return Result()
 
-            res = _query(first, node)
+            res = _query(first, node, trail)
             for q in queries:
                 if res:
                     res = _query(q, res)
@@ -420,32 +1367,67 @@ class _Queryable:
                     break
             return res
 
+        # Only Dicts that contain the name can match, so an index lets us skip
+        # everything else.
+        if owners is None:
+            nodes = _flatten_traced(self._value)
+        else:
+            nodes = zip(owners, trails) if trails is not None else ((o, None) for o in owners)
         res = Result()
-        for node in _flatten(self._value):
-            res.extend(match(node))
+        visited = 0
+        for node, trail in nodes:
+            visited += 1
+            _extend(res, match(node, trail))
+        profiling.visited(visited)
         return _Queryable(res)
 
+    @profiling.profiled
     def where(self, name, value=None):
         obj = self._value
-        if isinstance(obj, Dict):
-            obj = obj.values()
+        if isinstance(obj, _DICTS):
+            obj = [(c, _descend(obj, None, c)) for c in obj.values()]
         elif isinstance(obj, Result):
-            obj = obj.grandchildren
+            obj = _grandchildren(obj)
+        else:
+            obj = _traced(obj)
 
         res = List()
 
+        index = _get_index(self._value)
+        owners = None
+        if index is not None:
+            owners, _ = _index_owners(index, name if value is None else (name, value))
+
+        if owners is not None:
+            owners = set(owners)
+            # The index only knows which Dicts have the name and which values
+            # equal something. Other value predicates still have to be tested.
+            exact = value is None or _equality_values(value) is not None
+            qry = None if exact else WhereQuery(name, value)
+
+            def inner(value):
+                if value in owners and (qry is None or qry.test(value)):
+                    return value
+
+            for i, t in obj:
+                _extend(res, _query(inner, i, t))
+            return _Queryable(res)
+
         if isinstance(name, WhereBoolean):
-            qry = name
+            qry = name.optimize()
         elif isinstance(name, Boolean):
             qry = WhereQuery(name, value)
         elif callable(name):
 
             def inner(value):
-                if name(_Queryable(value)):
+                if name(_Row(value) if isinstance(value, _DICTS) else _Queryable(value)):
                     return value
 
-            for i in obj:
-                res.extend(_query(inner, i))
+            if profiling.current is not None:
+                inner = profiling.counted(inner)
+
+            for i, t in obj:
+                _extend(res, _query(inner, i, t))
             return _Queryable(res)
         else:
             qry = WhereQuery(name, value)
@@ -454,17 +1436,144 @@ class _Queryable:
             if qry.test(value):
                 return value
 
-        for i in obj:
-            res.extend(_query(inner, i))
+        for i, t in obj:
+            _extend(res, _query(inner, i, t))
         return _Queryable(res)
 
-    def to_df(self):
+    def _rows(self):
+        obj = self._value
+        if isinstance(obj, _DICTS):
+            return [obj]
+        if isinstance(obj, Result):
+            return obj.values
+        return obj
+
+    def _traced_rows(self):
+        """
+        Like _rows, but it yields (row, trail) pairs.
+        """
+        obj = self._value
+        if isinstance(obj, _DICTS):
+            return [(obj, None)]
+        if isinstance(obj, Result):
+            return (
+                r for c, t in _grandchildren(obj) for r in (_traced(c, t) if isinstance(c, _LISTS) else [(c, t)])
+            )
+        return _traced(obj)
+
+    @profiling.profiled
+    def select(self, *paths):
+        """
+        Returns a dict that maps each path to a list with its value in every
+        row, or None where a row doesn't have it. Rows are the Dicts this
+        contains, like the ones where returns. Paths are dotted strings or
+        tuples of keys, as for compile_path.
+
+        Everything is gathered in one pass over the rows, and the lists can be
+        handed straight to pandas or numpy.
+        """
+        keys = [compile_path(p).keys for p in paths]
+        columns = [[] for _ in paths]
+        cols = list(zip(keys, columns))
+        visited = 0
+        for row in self._rows():
+            visited += 1
+            for k, column in cols:
+                column.append(_field(row, k))
+        profiling.visited(visited)
+        return dict(zip(paths, columns))
+
+    @profiling.profiled
+    def to_df(self, *paths):
+        """
+        Returns a pandas DataFrame of the values this contains. If paths are
+        given, it has a column for each one built with select instead.
+        """
         import pandas
 
+        if paths:
+            return pandas.DataFrame(self.select(*paths), columns=list(paths))
         return pandas.DataFrame(self.values)
 
+    def _iter_values(self):
+        obj = self._value
+        if isinstance(obj, Result):
+            return obj.values
+        if isinstance(obj, _DICTS):
+            return iter(obj.values())
+        return iter(obj)
+
+    @profiling.profiled
     def most_common(self, n=None):
-        return Counter(self.values).most_common(n)
+        return Counter(self._iter_values()).most_common(n)
+
+    @profiling.profiled
+    def count_values(self, pred=None):
+        """
+        Returns how many values there are, or how many pred accepts. pred can
+        be a Boolean, a function, or a value to compare for equality. Values
+        are counted as they're generated, so none of them are collected.
+        """
+        values = self._iter_values()
+        if pred is None:
+            return sum(1 for _ in values)
+        if not isinstance(pred, Boolean):
+            pred = Predicate(pred) if callable(pred) else eq(pred)
+        test = pred.test
+        return sum(1 for v in values if test(v))
+
+    @profiling.profiled
+    def group_by(self, path):
+        """
+        Groups rows by their value at path, like the columns from select, and
+        returns a dict that maps each value to a queryable over its rows. Rows
+        without the path are grouped under None. Values that are lists are
+        grouped under tuples, and dicts under tuples of their sorted (key,
+        value) pairs, all the way down.
+        """
+        keys = compile_path(path).keys
+        groups = {}
+        for row, trail in self._traced_rows():
+            k = _field(row, keys)
+            if isinstance(k, (list, dict)):
+                k = _frozen(k)
+            try:
+                group = groups[k]
+            except KeyError:
+                group = groups[k] = List()
+            group.append(row)
+            _note(group, trail, row)
+        return dict((k, _Queryable(v)) for k, v in groups.items())
+
+    @profiling.profiled
+    def top_k(self, k, key=None):
+        """
+        Returns the k largest values, largest first. Only k values are kept
+        at a time.
+        """
+        return heapq.nlargest(k, self._iter_values(), key=key)
+
+    @profiling.profiled
+    def approx_distinct(self, precision=14):
+        """
+        Estimates how many distinct values there are with a HyperLogLog, which
+        uses 2 ** precision bytes however many there are.
+        """
+        hll = HyperLogLog(precision)
+        hll.update(self._iter_values())
+        return hll.estimate()
+
+    @profiling.profiled
+    def heavy_hitters(self, n=10, capacity=1000):
+        """
+        Like most_common, but it tracks at most capacity values, so memory
+        doesn't grow with the number of distinct values. Counts can be too
+        high for values that were near the bottom. Any value that's more than
+        1 / capacity of all values is found.
+        """
+        summary = SpaceSaving(max(n, capacity))
+        summary.update(self._iter_values())
+        return summary.most_common(n)
 
     def __iter__(self):
         for i in self._value:
@@ -485,112 +1594,343 @@ class _Queryable:
         return self.__getitem__(name)
 
     def __getitem__(self, pred):
-        if isinstance(pred, slice):
-            return _Queryable(Result(self._value[pred]))
-        if isinstance(pred, int):
-            return _Queryable(Result([self._value[pred]]))
+        if isinstance(pred, (slice, int)):
+            value = self._value
+            res = Result(value[pred]) if isinstance(pred, slice) else Result([value[pred]])
+            trails = getattr(value, "_trails", None)
+            if trails is not None and len(trails) == list.__len__(value):
+                res._trails = trails[pred] if isinstance(pred, slice) else [trails[pred]]
+            return _Queryable(res)
         return self.query(pred)
 
     def __lt__(self, other):
         try:
             return self.value < other.value
         except:
+            profiling.swallowed()
             return False
 
     def __le__(self, other):
         try:
             return self.value <= other.value
         except:
+            profiling.swallowed()
             return False
 
     def __eq__(self, other):
         try:
             return self.value == other.value
         except:
+            profiling.swallowed()
             return False
 
     def __ne__(self, other):
         try:
             return self.value != other.value
         except:
+            profiling.swallowed()
             return False
 
     def __ge__(self, other):
         try:
             return self.value >= other.value
         except:
+            profiling.swallowed()
             return False
 
     def __gt__(self, other):
         try:
             return self.value > other.value
         except:
+            profiling.swallowed()
             return False
 
     def matches(self, pattern, flags=0):
         try:
-            return re.search(pattern, self.value, flags)
+            return compile_pattern(pattern, flags).search(self.value)
         except:
+            profiling.swallowed()
             return False
 
     def isin(self, values):
         try:
             return self.value in values
         except:
+            profiling.swallowed()
             return False
 
     def contains(self, value):
         try:
             return value in self.value
         except:
+            profiling.swallowed()
             return False
 
     def startswith(self, value):
         try:
             return self.value.startswith(value)
         except:
+            profiling.swallowed()
             return False
 
     def endswith(self, value):
         try:
             return self.value.endswith(value)
         except:
+            profiling.swallowed()
             return False
 
+    @profiling.profiled
     def __repr__(self):
-        return yaml.dump(self._value, Dumper=_Dumper)
+        return render(self._value)
+
+    def page(self, number=1, size=None, format=None):
+        """
+        Returns the number'th page of size items as text. Lists inside them
+        are still shortened. size and format default to render_options.
+        """
+        options = render_options
+        size = size or options.limit or 50
+        if format is not None:
+            options = RenderOptions(options.limit, options.nodes, format)
+        return Rendered(render(self._value, options, (number - 1) * size, size))
+
+    def dump(self, out=None, format=None):
+        """
+        Writes everything, not just what __repr__ shows, to out or stdout.
+        """
+        dump(self._value, out, format)
+
+
+_MISSING = object()
+
+
+class _Row(_Queryable):
+    """
+    What where passes to a function for each Dict it tests. It's a normal
+    queryable except that looking up a key by name skips the general query
+    machinery and returns a _Field, since that's most of what predicates do.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        node = self._value
+        try:
+            return _Field(node, name, node[name])
+        except:
+            profiling.swallowed()
+            return _Field(node, name)
+
+    def __getitem__(self, pred):
+        if isinstance(pred, str):
+            return _lookup(self._value, pred)
+        return super(_Row, self).__getitem__(pred)
+
+
+class _Field(_Queryable):
+    """
+    The result of looking up a key in a _Row. It's the same Result a query
+    would return, but that's only built if something other than value, bool,
+    or another lookup needs it.
+    """
+
+    __slots__ = ("_node", "_name", "_raw", "_result")
+
+    def __init__(self, node, name, raw=_MISSING):
+        self._node = node
+        self._name = name
+        self._raw = raw
+        self._result = None
+
+    @property
+    def _value(self):
+        if self._result is None:
+            if self._raw is _MISSING:
+                self._result = Result()
+            else:
+                self._result = Result([Dict({self._name: self._raw}, parent=self._node)])
+        return self._result
+
+    @property
+    def value(self):
+        v = self._raw
+        if v is not _MISSING and not isinstance(v, _LISTS):
+            return v
+        v = [] if v is _MISSING else list(v)
+        assert len(v) == 1
+        return v[0]
 
+    def __bool__(self):
+        v = self._raw
+        if v is _MISSING:
+            return False
+        if isinstance(v, _LISTS):
+            return len(v) > 0
+        return True
+
+    __nonzero__ = __bool__
+
+    def __getattr__(self, name):
+        if isinstance(self._raw, _DICTS):
+            return _lookup(self._raw, name)
+        return self.__getitem__(name)
+
+
+def _lookup(node, name):
+    """
+    Does what a name query does to a single Dict.
+    """
+    try:
+        return _Field(node, name, node[name])
+    except:
+        profiling.swallowed()
+        return _Field(node, name)
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Models can be millions of small containers. The cyclic garbage collector
+    would otherwise run over and over while they're created, and none of
+    them are garbage.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _make_model(d, parent, index, dict_type, list_type, top_dict=None, top_list=None, interner=None):
+    """
+    Copies d into dict_type and list_type nodes. top_dict and top_list are the
+    types for the top node if they're different. If interner is an Interner,
+    it makes the copies.
+
+    Each node starts as a shallow copy of its data, so primitives don't have
+    to be touched again, and then its dicts and lists are replaced with nodes.
+    That's done in pre-order with a stack of iterators instead of recursion,
+    so the index sees Dicts in find order and deep documents don't need deep
+    call stacks.
+    """
+    copy_list = copy_dict = None
+    if interner is not None:
+        interner.start_document()
+        copy_list, copy_dict = interner.copy_list, interner.copy_dict
 
-def make_model(d, parent=None):
     if isinstance(d, list):
-        node = List(parent=parent)
-        node.extend(make_model(v, parent=node) for v in d)
-        return node
+        root = (top_list or list_type)(d if copy_list is None else copy_list(d), parent=parent)
+        stack = [(root, enumerate(d))]
     elif isinstance(d, dict):
-        node = Dict(parent=parent)
-        for k, v in d.items():
-            node[k] = make_model(v, parent=node)
-        return node
+        root = (top_dict or dict_type)(d if copy_dict is None else copy_dict(d), parent=parent)
+        if index is not None:
+            index.add(root, d)
+        stack = [(root, iter(d.items()))]
     else:
         return d
 
+    while stack:
+        node, items = stack[-1]
+        for k, v in items:
+            if isinstance(v, list):
+                child = node[k] = list_type(v if copy_list is None else copy_list(v), parent=node)
+                stack.append((child, enumerate(v)))
+                break
+            elif isinstance(v, dict):
+                child = node[k] = dict_type(v if copy_dict is None else copy_dict(v), parent=node)
+                if index is not None:
+                    index.add(child, v)
+                stack.append((child, iter(v.items())))
+                break
+        else:
+            stack.pop()
+    return root
+
+
+def make_model(d, parent=None, index=None, compact=False, lazy=False, interner=None, share=None):
+    """
+    Converts nested dicts and lists into Dicts and Lists with parent links. If
+    index is an Index, every Dict is added to it as it's created.
+
+    If interner is an Interner, keys and maybe string values are replaced
+    with shared copies from it. Use the same one for every document.
+
+    If compact is True, everything below the top node is a CompactDict or
+    CompactList, which use much less memory. The top node is a regular Dict or
+    List so attributes like source can still be set on it.
+
+    If share is a SubtreeTable, subtrees that are identical to ones it has
+    already seen are stored once, as SharedDicts and SharedLists. Use the same
+    one for every document. compact doesn't matter then, since shared nodes
+    are compact anyway.
+
+    If lazy is True, only the top node is converted and the rest are converted
+    as queries reach them. See LazyDict. It can't be combined with index,
+    compact, interner, or share.
+    """
+    if lazy:
+        if index is not None or compact or interner is not None or share is not None:
+            raise ValueError("lazy models can't be indexed, compact, interned, or shared.")
+        return _lazy(d, parent)
+
+    with _gc_paused():
+        if share is not None:
+            root = share.build(d, parent, interner)
+            if index is not None:
+                # A shared Dict is added once for each place it appears, with
+                # the trail to it, so the index stays in find order.
+                for node, trail in _flatten_traced(root, lasting=True):
+                    if isinstance(node, _DICTS):
+                        index.add(node, trail=trail)
+            return root
+        if not compact:
+            return _make_model(d, parent, index, Dict, List, interner=interner)
+        return _make_model(d, parent, index, CompactDict, CompactList, Dict, List, interner)
+
 
 convert = make_model
 from_dict = make_model
 
 
-def Queryable(data):
-    if not isinstance(data, (List, Dict, Result)):
-        data = make_model(data)
+def Queryable(data, index=None, compact=False, lazy=False, interner=None, share=None):
+    """
+    Wraps data in a queryable object, converting it to a model first if it
+    isn't one. compact, lazy, interner, and share are passed to make_model.
+
+    index can be True to build an Index over the model or an Index that was
+    filled in by make_model. find and query use it when it's present.
+    """
+    if index is True:
+        index = Index.build(data) if isinstance(data, _NODES) else Index()
+    elif index is False:
+        index = None
+
+    if not isinstance(data, _NODES + (Result,)):
+        data = make_model(data, index=index, compact=compact, lazy=lazy, interner=interner, share=share)
+
+    if index is not None and isinstance(data, _NODES):
+        data._index = index
 #    if isinstance(data, Dict):
 #        data.parent = List()
 #        data.parent.append(data)
     return _Queryable(data)
 
 
-def from_yaml(path):
+def from_yaml(path, lazy=False, interner=None):
     with open(path) as f:
-        return Queryable(yaml.load(f, Loader=_Loader))
+        return Queryable(yaml.load(f, Loader=_Loader), lazy=lazy, interner=interner)
+
+
+def from_json(path, lazy=False, interner=None):
+    """
+    Like from_yaml for json files. It uses orjson or ujson if one is
+    installed, which are much faster than the yaml parser.
+    """
+    with open(path, "rb") as f:
+        return Queryable(json_loads(f.read()), lazy=lazy, interner=interner)
 
 
 def Dict_representer(dumper, data):
@@ -598,11 +1938,12 @@ def Dict_representer(dumper, data):
     return dumper.represent_mapping("tag:yaml.org,2002:map", data)
 
 
-yaml.add_representer(Dict, Dict_representer, Dumper=yaml.Dumper)
-yaml.add_representer(Dict, Dict_representer, Dumper=_BaseDumper)
-yaml.add_representer(Dict, Dict_representer, Dumper=_Dumper)
-if _Dumper is not yaml.SafeDumper:
-    yaml.add_representer(Dict, Dict_representer, Dumper=yaml.SafeDumper)
+for _t in _DICTS + (LazyDict,):
+    yaml.add_representer(_t, Dict_representer, Dumper=yaml.Dumper)
+    yaml.add_representer(_t, Dict_representer, Dumper=_BaseDumper)
+    yaml.add_representer(_t, Dict_representer, Dumper=_Dumper)
+    if _Dumper is not yaml.SafeDumper:
+        yaml.add_representer(_t, Dict_representer, Dumper=yaml.SafeDumper)
 
 
 def List_representer(dumper, data):
@@ -610,11 +1951,12 @@ def List_representer(dumper, data):
     return dumper.represent_sequence("tag:yaml.org,2002:seq", data)
 
 
-yaml.add_representer(List, List_representer, Dumper=yaml.Dumper)
-yaml.add_representer(List, List_representer, Dumper=_BaseDumper)
-yaml.add_representer(List, List_representer, Dumper=_Dumper)
-if _Dumper is not yaml.SafeDumper:
-    yaml.add_representer(List, List_representer, Dumper=yaml.SafeDumper)
+for _t in _LISTS + (LazyList,):
+    yaml.add_representer(_t, List_representer, Dumper=yaml.Dumper)
+    yaml.add_representer(_t, List_representer, Dumper=_BaseDumper)
+    yaml.add_representer(_t, List_representer, Dumper=_Dumper)
+    if _Dumper is not yaml.SafeDumper:
+        yaml.add_representer(_t, List_representer, Dumper=yaml.SafeDumper)
 
 
 yaml.add_representer(Result, List_representer, Dumper=yaml.Dumper)
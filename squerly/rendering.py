@@ -0,0 +1,211 @@
+"""
+The rendering module turns models and results into text in bounded time and
+memory. Dumping everything as yaml means showing a Result with fifty
+thousand items in a shell takes minutes, so render only shows the first
+items of each list and says how many it left out. dump writes everything,
+one top level item at a time.
+
+    render_options.limit = 20
+    conf.find("image")
+    conf.find("image").page(3)
+    conf.find("image").dump(open("images.json", "w"), format="json")
+"""
+import json
+import sys
+import yaml
+from itertools import islice
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = [
+    "RenderOptions",
+    "Rendered",
+    "dump",
+    "render",
+    "render_options",
+]
+
+_BaseDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+class _Dumper(_BaseDumper):
+    def ignore_aliases(self, *args):
+        return True
+
+
+class RenderOptions(object):
+    """
+    How render shows things. render_options is the one queryables use.
+
+    limit is the most items of any list that are shown, and nodes is about
+    the most dicts, lists, and values shown in all. Either can be None to
+    show everything. format is "yaml" or "json".
+    """
+
+    def __init__(self, limit=50, nodes=10000, format="yaml"):
+        if format not in ("yaml", "json"):
+            raise ValueError("format must be yaml or json.")
+        self.limit = limit
+        self.nodes = nodes
+        self.format = format
+
+    def __repr__(self):
+        return "RenderOptions(limit=%r, nodes=%r, format=%r)" % (self.limit, self.nodes, self.format)
+
+
+render_options = RenderOptions()
+
+class _Cut(str):
+    """
+    Marks where nodes ran out. It's written as "...", but it's only equal to
+    itself, so it doesn't replace a real "..." key or look like a real "..."
+    item.
+    """
+
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    __hash__ = object.__hash__
+
+
+_CUT = _Cut("...")
+
+_Dumper.add_representer(_Cut, lambda dumper, value: dumper.represent_str(str(value)))
+
+
+class Rendered(str):
+    """
+    Text that shows as itself in a shell instead of as a quoted string.
+    """
+
+    def __repr__(self):
+        return str(self)
+
+
+def _json(data, indent=True):
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(data, default=str, option=option).decode("utf-8")
+        except TypeError:
+            # Like ints too big for 64 bits.
+            pass
+    return json.dumps(data, default=str, indent=2 if indent else None)
+
+
+def _dumps(data, format):
+    if format == "json":
+        return _json(data) + "\n"
+    return yaml.dump(data, Dumper=_Dumper)
+
+
+def _length(value):
+    # A Result's len counts its values. Its items are what's shown.
+    return list.__len__(value)
+
+
+def _open(value, limit, start=0, count=None):
+    """
+    Returns an empty copy of value, an iterator over the (key, value) pairs
+    to put in it, and how many list items are left out.
+    """
+    if isinstance(value, dict):
+        return {}, iter(value.items()), 0
+    count = limit if count is None else count
+    if count is None:
+        return [], ((None, v) for v in islice(value, start, None)), 0
+    left = _length(value) - start - count
+    return [], ((None, v) for v in islice(value, start, start + count)), max(0, left)
+
+
+def _put(dst, k, v):
+    if isinstance(dst, list):
+        dst.append(v)
+    else:
+        dst[k] = v
+
+
+def _truncate(value, limit, nodes, start=0, count=None):
+    """
+    Returns a plain copy of value with at most limit items from each list and
+    about nodes nodes in all. For a top level list, count items are shown
+    starting at start. Other lists that are cut short end with a note of how
+    many items were left out, and "..." marks where nodes ran out. It keeps a
+    stack of iterators like _flatten, so it only ever touches what's shown.
+    """
+    if not isinstance(value, (dict, list)):
+        return value
+    root, items, _ = _open(value, limit, start, count)
+    stack = [(root, items, 0)]
+    seen = 0
+    while stack:
+        dst, items, left = stack[-1]
+        for k, v in items:
+            seen += 1
+            if nodes is not None and seen > nodes:
+                for dst, _, _ in stack:
+                    _put(dst, _CUT, _CUT)
+                return root
+            if isinstance(v, (dict, list)):
+                child, child_items, child_left = _open(v, limit)
+                _put(dst, k, child)
+                stack.append((child, child_items, child_left))
+                break
+            _put(dst, k, v)
+        else:
+            stack.pop()
+            if left:
+                dst.append("... %d more" % left)
+    return root
+
+
+def render(value, options=None, start=0, count=None):
+    """
+    Returns value as text, shortened as options, or render_options, say. If
+    value is a list, count of its items starting at start are shown, or
+    options.limit of them, and a last line says which ones they were if
+    that's not all of them.
+    """
+    options = options or render_options
+    data = _truncate(value, options.limit, options.nodes, start, count)
+    text = _dumps(data, options.format)
+    if isinstance(value, list):
+        total = _length(value)
+        shown = _length(data) - (1 if data and data[-1] is _CUT else 0)
+        if start or shown < total:
+            if shown:
+                text += "# items %d-%d of %d\n" % (start + 1, start + shown, total)
+            else:
+                text += "# no items after %d of %d\n" % (start, total)
+    return text
+
+
+def dump(value, out=None, format=None):
+    """
+    Writes all of value to out, or sys.stdout. Lists are written one item at
+    a time, so only one item is ever held as text. json lists have one item
+    per line.
+    """
+    out = out or sys.stdout
+    format = format or render_options.format
+    if not isinstance(value, list):
+        out.write(_dumps(value, format))
+        return
+
+    if format == "json":
+        out.write("[")
+        for i, v in enumerate(value):
+            out.write(",\n" if i else "\n")
+            out.write(_json(v, indent=False))
+        out.write("\n]\n")
+    elif not _length(value):
+        out.write(_dumps([], format))
+    else:
+        for v in value:
+            out.write(yaml.dump([v], Dumper=_Dumper))
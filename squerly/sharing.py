@@ -0,0 +1,144 @@
+"""
+The sharing module lets models built from many documents store identical
+subtrees once. Documents like Pods from the same Deployment repeat whole
+containers, tolerations, and volumes, and each copy would otherwise be its
+own set of nodes.
+
+Shared nodes can be under many parents, so parents, roots, and upto follow
+all of them. A match inside a shared subtree leads back to every document
+that contains it.
+"""
+from .query import _SharedBase, Dict, List, SharedDict, SharedList
+
+__all__ = [
+    "SubtreeTable",
+]
+
+
+def _children(node):
+    return node.values() if isinstance(node, dict) else node
+
+
+class SubtreeTable(object):
+    """
+    A table of shared subtrees. make_model uses it to build everything below
+    the top node of a document bottom up, and each dict or list whose keys
+    and values are the same as one it already has becomes that one.
+
+    Values are compared with their types, so 1, 1.0, and True aren't the
+    same, and nodes are compared by identity, which is enough since their
+    own children were shared first. Subtrees with unhashable values aren't
+    shared.
+
+    lookups is the number of subtrees built, and shared is how many of them
+    were already in the table.
+    """
+
+    def __init__(self):
+        self.table = {}
+        self.lookups = 0
+        self.shared = 0
+        # Key and type tuples repeat much more than the subtrees do.
+        self._tuples = {}
+
+    def _key(self, keys, values):
+        keys = None if keys is None else self._tuples.setdefault(keys, keys)
+        types = tuple(type(v) for v in values)
+        return (keys, values, self._tuples.setdefault(types, types))
+
+    def _node(self, keys, values):
+        self.lookups += 1
+        values = tuple(values)
+        key = self._key(None if keys is None else tuple(keys), values)
+        try:
+            node = self.table.get(key)
+        except TypeError:
+            key = node = None
+        if node is not None:
+            self.shared += 1
+            return node
+
+        node = SharedList(values) if keys is None else SharedDict(zip(keys, values))
+        for v in values:
+            if isinstance(v, _SharedBase):
+                v._add_parent(node)
+        if key is not None:
+            self.table[key] = node
+        return node
+
+    def build(self, d, parent=None, interner=None):
+        """
+        Returns a Dict or List for d whose dicts and lists are shared nodes.
+        If interner is an Interner, it makes copies of them first. It's done
+        with a stack instead of recursion, like make_model.
+        """
+        if not isinstance(d, (dict, list)):
+            return d
+
+        copy_list = copy_dict = None
+        if interner is not None:
+            interner.start_document()
+            copy_list, copy_dict = interner.copy_list, interner.copy_dict
+
+        def frame(key, v):
+            # The key v is under, whether it's a dict, its items, and the
+            # keys and values that are done.
+            if isinstance(v, dict):
+                items = (v if copy_dict is None else copy_dict(v)).items()
+                return (key, True, iter(items), [], [])
+            return (key, False, enumerate(v if copy_list is None else copy_list(v)), [], [])
+
+        stack = [frame(None, d)]
+        while True:
+            key, is_dict, items, keys, values = stack[-1]
+            for k, v in items:
+                if isinstance(v, (dict, list)):
+                    stack.append(frame(k, v))
+                    break
+                keys.append(k)
+                values.append(v)
+            else:
+                stack.pop()
+                if not stack:
+                    break
+                node = self._node(keys if is_dict else None, values)
+                stack[-1][3].append(key)
+                stack[-1][4].append(node)
+
+        # The top node isn't shared so attributes like source can be set on it.
+        root = Dict(zip(keys, values), parent=parent) if is_dict else List(values, parent=parent)
+        for v in values:
+            if isinstance(v, _SharedBase):
+                v._add_parent(root)
+        return root
+
+    def release(self, root):
+        """
+        Removes root, a node build returned, from the parents of the nodes
+        under it. Nodes that are left without parents are dropped from the
+        table and released in turn, so parents only lead to documents that
+        are still in use.
+        """
+        stack = [(root, c) for c in _children(root)]
+        while stack:
+            parent, node = stack.pop()
+            if not isinstance(node, _SharedBase):
+                continue
+            node._remove_parent(parent)
+            if node.parent is not None:
+                continue
+            is_dict = isinstance(node, dict)
+            values = tuple(_children(node))
+            try:
+                key = self._key(tuple(node) if is_dict else None, values)
+                if self.table.get(key) is node:
+                    del self.table[key]
+            except TypeError:
+                pass
+            stack.extend((node, c) for c in values)
+
+    def report(self):
+        return "%d distinct subtrees, %d of %d shared" % (len(self.table), self.shared, self.lookups)
+
+    def __repr__(self):
+        return "SubtreeTable(%s)" % self.report()
@@ -0,0 +1,164 @@
+"""
+The snapshot module saves a built model to a file and loads it back, so a
+large set of documents only has to be parsed and converted once. Parent
+links, attributes like source, and any Index attached to the model are all
+kept.
+
+pickle recurses into containers, so models with documents deeper than the
+recursion limit are written as a flat table of their nodes instead. That's
+slower, so it's only done when pickling the model directly fails.
+
+Snapshots are pickles, so only load ones you trust.
+"""
+import os
+import pickle
+import tempfile
+
+from .query import _NODES, _Queryable, _Trail, Index, Result, _gc_paused
+
+__all__ = [
+    "load_snapshot",
+    "save_snapshot",
+]
+
+MAGIC = b"SQUERLY-SNAPSHOT\n"
+
+# Bump this when changes to the model classes make old snapshots unusable.
+# 2: the model is saved as a tree or as a flat table.
+# 3: Indexes keep the trails of shared Dicts.
+VERSION = 3
+
+_slots = {}
+
+
+def _slot_names(cls):
+    try:
+        return _slots[cls]
+    except KeyError:
+        names = _slots[cls] = tuple(n for c in cls.__mro__ for n in getattr(c, "__slots__", ()))
+        return names
+
+
+def _to_table(data):
+    """
+    Returns a list of (class, keys, values, attribute names, refs) for every
+    dict, list, Index, and trail reachable from data, through values, parents, or
+    anything else they hold. data is the first one. values has
+    the node's items followed by its attributes, and refs has the positions
+    in values that hold the table position of a node instead of a value.
+    It works through a queue instead of recursing.
+    """
+    types = (dict, list, Index, _Trail)
+    ids = {id(data): 0}
+    nodes = [data]
+    # The same tuple of names is reused so pickle only writes it once.
+    all_names = {}
+    table = []
+    append = table.append
+    # nodes grows as new ones are found.
+    for obj in nodes:
+        cls = type(obj)
+        if isinstance(obj, dict):
+            # The dict and list methods skip conversion in lazy nodes.
+            keys = list(dict.keys(obj))
+            values = list(dict.values(obj))
+        elif isinstance(obj, list):
+            keys = None
+            values = list(list.__iter__(obj))
+        else:
+            keys = None
+            values = []
+
+        names = ()
+        attributes = getattr(obj, "__dict__", None)
+        if attributes:
+            names = tuple(attributes)
+            values.extend(attributes.values())
+        slots = _slots.get(cls)
+        if slots is None:
+            slots = _slot_names(cls)
+        if slots:
+            found = []
+            for name in slots:
+                try:
+                    values.append(object.__getattribute__(obj, name))
+                    found.append(name)
+                except AttributeError:
+                    pass
+            names += tuple(found)
+        names = all_names.setdefault(names, names)
+
+        refs = [i for i, v in enumerate(values) if isinstance(v, types)]
+        for i in refs:
+            v = values[i]
+            n = ids.get(id(v))
+            if n is None:
+                n = ids[id(v)] = len(nodes)
+                nodes.append(v)
+            values[i] = n
+        append((cls, keys, values, names, refs))
+    return table
+
+
+def _from_table(table):
+    nodes = [record[0].__new__(record[0]) for record in table]
+    for obj, (_, keys, values, names, refs) in zip(nodes, table):
+        for i in refs:
+            values[i] = nodes[values[i]]
+        size = len(values) - len(names)
+        # The dict and list methods get around shared nodes being read-only.
+        if keys is not None:
+            dict.update(obj, zip(keys, values))
+        elif isinstance(obj, list):
+            list.extend(obj, values[:size])
+        for name, value in zip(names, values[size:]):
+            if name == "_hash":
+                # Nodes hash by identity.
+                value = object.__hash__(obj)
+            object.__setattr__(obj, name, value)
+    return nodes[0]
+
+
+def save_snapshot(data, path):
+    """
+    Writes data to path. data is a queryable, a Dict or List from make_model,
+    or a Result. The file is written to a temporary name first and then
+    renamed, so readers never see a partial snapshot.
+    """
+    if isinstance(data, _Queryable):
+        data = data._value
+    if not isinstance(data, _NODES + (Result,)):
+        raise ValueError("Only models and Results can be saved.")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f, _gc_paused():
+            f.write(MAGIC)
+            try:
+                pickle.dump((VERSION, "tree", data), f, protocol=pickle.HIGHEST_PROTOCOL)
+            except RecursionError:
+                f.seek(len(MAGIC))
+                f.truncate()
+                pickle.dump((VERSION, "table", _to_table(data)), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except:
+        os.unlink(tmp)
+        raise
+
+
+def load_snapshot(path):
+    """
+    Returns a queryable over the model saved at path.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s isn't a squerly snapshot." % path)
+        with _gc_paused():
+            saved = pickle.load(f)
+            if saved[0] != VERSION:
+                raise ValueError("%s is a version %s snapshot. Only version %s is supported." % (path, saved[0], VERSION))
+            _, form, data = saved
+            if form == "table":
+                data = _from_table(data)
+    return _Queryable(data)
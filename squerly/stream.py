@@ -0,0 +1,110 @@
+"""
+The stream module runs queries over sequences of documents one document at a
+time, so a multi-document yaml file never has to be in memory all at once.
+"""
+import yaml
+
+from .query import _Loader, _Queryable, _extend, List, Queryable, Result, make_model
+
+__all__ = [
+    "Stream",
+    "from_yaml_stream",
+]
+
+
+class Stream(object):
+    """
+    A pipeline of queries applied to each document in a sequence. Building a
+    pipeline doesn't load anything. Iterating it converts one document at a
+    time, runs the pipeline against it, and yields each match as its own
+    queryable before moving on to the next document. Documents are treated
+    like the roots analyze.py collects in a List.
+
+    docs is an iterable of plain documents or a function that returns one. Use
+    a function if the stream should be iterable more than once.
+    """
+
+    def __init__(self, docs, ops=()):
+        self._docs = docs
+        self._ops = ops
+
+    def _then(self, op, *args):
+        return Stream(self._docs, self._ops + ((op, args),))
+
+    def query(self, pred):
+        return self._then("query", pred)
+
+    def find(self, first, *rest):
+        return self._then("find", first, *rest)
+
+    def where(self, name, value=None):
+        return self._then("where", name, value)
+
+    def upto(self, pred):
+        return self._then("upto", pred)
+
+    @property
+    def parents(self):
+        return self._then("parents")
+
+    @property
+    def roots(self):
+        return self._then("roots")
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self.query(name)
+
+    def __getitem__(self, pred):
+        return self.query(pred)
+
+    def results(self):
+        """
+        Yields the result of the pipeline for each document that has any
+        matches.
+        """
+        docs = self._docs() if callable(self._docs) else self._docs
+        for doc in docs:
+            if not isinstance(doc, (dict, list)):
+                continue
+            # Like analyze.py, each document is a root inside a List, so where
+            # filters documents and roots stops at the document.
+            res = Queryable(List([make_model(doc)]))
+            for op, args in self._ops:
+                res = getattr(res, op)
+                if args:
+                    res = res(*args)
+            if res:
+                yield res
+
+    def __iter__(self):
+        for res in self.results():
+            for i in res._value:
+                yield _Queryable(Result([i]))
+
+    def collect(self):
+        """
+        Runs the pipeline over every document and returns all of the matches
+        as a single queryable.
+        """
+        value = None
+        for res in self.results():
+            if value is None:
+                value = type(res._value)()
+            _extend(value, res._value)
+        return Queryable(Result() if value is None else value)
+
+
+def from_yaml_stream(path):
+    """
+    Returns a Stream over the documents in a multi-document yaml file. The
+    file is read incrementally each time the stream is iterated.
+    """
+
+    def docs():
+        with open(path) as f:
+            for doc in yaml.load_all(f, Loader=_Loader):
+                yield doc
+
+    return Stream(docs)
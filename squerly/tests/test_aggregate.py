@@ -0,0 +1,80 @@
+import pytest
+
+from squerly.aggregate import HyperLogLog, SpaceSaving
+from squerly.boolean import gt
+from squerly.query import Queryable
+
+DATA = [
+    {"kind": "Pod", "metadata": {"name": "a"}, "status": {"phase": "Running", "restarts": 3}},
+    {"kind": "Pod", "metadata": {"name": "b"}, "status": {"phase": "Running", "restarts": 0}},
+    {"kind": "Pod", "metadata": {"name": "c"}, "status": {"phase": "Pending", "restarts": 7}},
+    {"kind": "Node", "metadata": {"name": "n"}},
+]
+
+CONF = Queryable(DATA)
+
+
+def test_hyperloglog():
+    hll = HyperLogLog()
+    hll.update(range(100000))
+    hll.update(range(50000))
+    assert abs(hll.estimate() - 100000) < 3000
+
+    small = HyperLogLog()
+    small.update(["a", "b", "c", "a", ["unhashable"]])
+    assert len(small) == 4
+
+    other = HyperLogLog()
+    other.update(range(100000, 200000))
+    hll.merge(other)
+    assert abs(hll.estimate() - 200000) < 6000
+
+    with pytest.raises(ValueError):
+        hll.merge(HyperLogLog(10))
+
+
+def test_space_saving():
+    summary = SpaceSaving(10)
+    for i in range(10000):
+        summary.add("hot" if i % 3 == 0 else i)
+    top = summary.most_common(1)
+    assert top[0][0] == "hot"
+    assert top[0][1] - summary.errors["hot"] <= 3334 <= top[0][1]
+    assert len(summary.counts) == 10
+
+
+def test_count_values():
+    assert CONF.kind.count_values() == 4
+    assert CONF.kind.count_values("Pod") == 3
+    assert CONF.status.restarts.count_values(gt(1)) == 2
+    assert CONF.status.restarts.count_values(lambda v: v.missing) == 0
+
+
+def test_group_by():
+    groups = CONF.group_by("status.phase")
+    assert list(groups) == ["Running", "Pending", None]
+    assert groups["Running"].metadata.name.values == ["a", "b"]
+    assert groups[None].kind.values == ["Node"]
+
+
+def test_group_by_nested():
+    conf = Queryable([
+        {"name": "a", "spec": {"ports": [[80, 443]], "labels": {"b": 2, "a": 1}}},
+        {"name": "b", "spec": {"ports": [[80, 443]], "labels": {"a": 1, "b": 2}}},
+        {"name": "c", "spec": {"ports": [[8080]], "labels": {"a": 1}}},
+    ])
+    groups = conf.group_by("spec.ports")
+    assert sorted(groups) == [((80, 443),), ((8080,),)]
+    assert groups[((80, 443),)].name.values == ["a", "b"]
+    groups = conf.group_by("spec.labels")
+    assert groups[(("a", 1), ("b", 2))].name.values == ["a", "b"]
+
+
+def test_top_k_and_distinct():
+    assert CONF.status.restarts.top_k(2) == [7, 3]
+    assert CONF.metadata.name.top_k(1, key=lambda v: v == "b") == ["b"]
+    assert CONF.kind.approx_distinct() == 2
+
+
+def test_heavy_hitters():
+    assert CONF.kind.heavy_hitters(1) == CONF.kind.most_common(1) == [("Pod", 3)]
@@ -0,0 +1,166 @@
+import os
+
+from analyze import _get_files, analyze, ParseCache
+
+
+def write_docs(path):
+    for i in range(5):
+        with open(os.path.join(str(path), "doc%d.yaml" % i), "w") as f:
+            f.write("kind: Pod\nmetadata:\n  name: pod-%d\n" % i)
+    with open(os.path.join(str(path), "ignored.log"), "w") as f:
+        f.write("kind: Log\n")
+
+
+def test_analyze_serial(tmp_path):
+    write_docs(tmp_path)
+    conf = analyze([str(tmp_path)])
+    assert len(conf) == 5
+    assert conf.kind.unique_values == ["Pod"]
+
+
+def test_analyze_parallel_matches_serial(tmp_path):
+    write_docs(tmp_path)
+    serial = analyze([str(tmp_path)])
+    parallel = analyze([str(tmp_path)], workers=2)
+    assert [d.source for d in parallel._value] == [d.source for d in serial._value]
+    assert parallel.metadata.name.values == serial.metadata.name.values
+
+
+def test_analyze_cache(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    write_docs(docs)
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    first = analyze([str(docs)], cache=cache)
+    assert (cache.hits, cache.misses) == (0, 5)
+
+    second = analyze([str(docs)], cache=cache)
+    assert (cache.hits, cache.misses) == (5, 5)
+    assert second.metadata.name.values == first.metadata.name.values
+
+    with open(str(docs / "doc0.yaml"), "w") as f:
+        f.write("kind: Pod\nmetadata:\n  name: changed\n")
+    third = analyze([str(docs)], cache=cache)
+    assert (cache.hits, cache.misses) == (9, 6)
+    assert "changed" in third.metadata.name.values
+
+
+def test_analyze_cache_touched_file_is_hit(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    write_docs(docs)
+    cache = ParseCache(str(tmp_path / "cache"))
+    analyze([str(docs)], cache=cache)
+
+    path = str(docs / "doc0.yaml")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    analyze([str(docs)], cache=cache, workers=2)
+    assert (cache.hits, cache.misses) == (5, 5)
+
+
+def test_analyze_index(tmp_path):
+    write_docs(tmp_path)
+    plain = analyze([str(tmp_path)])
+    indexed = analyze([str(tmp_path)], index=True)
+    assert indexed.find("name").values == plain.find("name").values
+
+
+def test_analyze_compact(tmp_path):
+    write_docs(tmp_path)
+    conf = analyze([str(tmp_path)], compact=True)
+    assert conf.find("name").roots.kind.unique_values == ["Pod"]
+    assert all(d.source.endswith(".yaml") for d in conf._value)
+
+
+def test_analyze_json(tmp_path):
+    with open(str(tmp_path / "pods.json"), "w") as f:
+        f.write(' {"kind": "PodList", "items": [{"metadata": {"name": "a"}}]}')
+    with open(str(tmp_path / "flow.yaml"), "w") as f:
+        f.write("{kind: Flow, items: [{metadata: {name: b}}]}")
+    with open(str(tmp_path / "scalar.json"), "w") as f:
+        f.write("1")
+    conf = analyze([str(tmp_path)])
+    assert sorted(conf.kind.values) == ["Flow", "PodList"]
+    assert sorted(conf.items.metadata.name.values) == ["a", "b"]
+
+
+def test_get_files_deep(tmp_path):
+    path = tmp_path
+    expected = []
+    for i in range(50):
+        path = path / ("d%d" % i)
+        path.mkdir()
+        (path / "f.yaml").write_text("a: %d\n" % i)
+        expected.append(str(path / "f.yaml"))
+    assert sorted(_get_files(str(tmp_path))) == sorted(expected)
+    assert len(analyze([str(tmp_path)])) == 50
+
+
+def test_analyze_refresh(tmp_path):
+    write_docs(tmp_path)
+    conf = analyze([str(tmp_path)], index=True)
+    roots = conf._value
+    unchanged = [d for d in roots if d.source.endswith("doc1.yaml")][0]
+    assert conf.refresh() == ([], [], [])
+
+    with open(str(tmp_path / "doc0.yaml"), "w") as f:
+        f.write("kind: Pod\nmetadata:\n  name: changed-pod\n")
+    os.remove(str(tmp_path / "doc4.yaml"))
+    with open(str(tmp_path / "new.json"), "w") as f:
+        f.write('{"kind": "Node", "metadata": {"name": "node-0"}}')
+
+    added, changed, removed = conf.refresh()
+    assert added == [str(tmp_path / "new.json")]
+    assert changed == [str(tmp_path / "doc0.yaml")]
+    assert removed == [str(tmp_path / "doc4.yaml")]
+
+    assert conf._value is roots
+    assert unchanged in roots
+    assert sorted(conf.metadata.name.values) == ["changed-pod", "node-0", "pod-1", "pod-2", "pod-3"]
+    assert conf.find(("kind", "Node")).roots.metadata.name.values == ["node-0"]
+    assert conf.find(("name", "pod-4")).values == []
+
+
+def test_analyze_refresh_shared(tmp_path):
+    write_docs(tmp_path)
+    conf = analyze([str(tmp_path)], share=True)
+    assert len(conf.find("kind").roots) == 5
+
+    with open(str(tmp_path / "doc0.yaml"), "w") as f:
+        f.write("kind: Pod\nmetadata:\n  name: changed-pod\n")
+    os.remove(str(tmp_path / "doc4.yaml"))
+    conf.refresh()
+
+    assert sorted(conf.find("name").roots.metadata.name.values) == ["changed-pod", "pod-1", "pod-2", "pod-3"]
+
+
+def test_analyze_cache_write_failure(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    write_docs(docs)
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    def fail(*args):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(cache, "_write", fail)
+    doc, hit = cache.load(str(docs / "doc0.yaml"))
+    assert doc["metadata"]["name"] == "pod-0"
+    assert not hit
+    assert len(analyze([str(docs)], cache=cache)) == 5
+
+
+def test_analyze_cache_version(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    write_docs(docs)
+    cache = ParseCache(str(tmp_path / "cache"))
+    analyze([str(docs)], cache=cache)
+    analyze([str(docs)], cache=cache)
+    assert (cache.hits, cache.misses) == (5, 5)
+
+    monkeypatch.setattr(ParseCache, "VERSION", ParseCache.VERSION + 1)
+    analyze([str(docs)], cache=cache)
+    assert (cache.hits, cache.misses) == (5, 10)
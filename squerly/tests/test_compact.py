@@ -0,0 +1,56 @@
+import tracemalloc
+
+from squerly.query import CompactDict, CompactList, Dict, List, Queryable, make_model
+
+DATA = [
+    {
+        "top": {
+            "a": {"r": {"b": 45}},
+            "d": 2,
+            "c": {"a": 2, "b": 4},
+            "l": [{"a": 7}, [1, 2]],
+        },
+    },
+    {"top": {"a": 9, "b": 6, "c": {"a": 8, "b": 7}}},
+]
+
+REGULAR = Queryable(DATA)
+COMPACT = Queryable(DATA, compact=True)
+
+
+def test_compact_types():
+    model = make_model(DATA, compact=True)
+    assert type(model) is List
+    assert type(model[0]) is CompactDict
+    assert type(model[0]["top"]["l"]) is CompactList
+    assert model[0]["top"]["l"][0].parent is model[0]["top"]["l"]
+    assert not hasattr(model[0], "__dict__")
+
+    root = make_model(DATA[0], compact=True)
+    assert type(root) is Dict
+    root.source = "somewhere"
+
+
+def test_compact_queries_match_regular():
+    for q in [lambda c: c.find("a"), lambda c: c.find("b").upto("a"), lambda c: c.find("a").parents,
+              lambda c: c.top.c.b, lambda c: c.find("a").roots.top.d, lambda c: c.top.where("d", 2)]:
+        assert repr(q(COMPACT)) == repr(q(REGULAR))
+    assert COMPACT.keys() == REGULAR.keys()
+    assert len(COMPACT.find("a").roots) == len(REGULAR.find("a").roots)
+
+
+def model_size(compact):
+    data = [{"metadata": {"name": "pod-%d" % i, "labels": {"app": "a"}},
+             "spec": {"containers": [{"name": "c", "ports": [{"port": 80}]}]}} for i in range(200)]
+    tracemalloc.start()
+    try:
+        model = make_model(data, compact=compact)
+        return tracemalloc.get_traced_memory()[0], model
+    finally:
+        tracemalloc.stop()
+
+
+def test_compact_uses_less_memory():
+    regular, _ = model_size(False)
+    compact, _ = model_size(True)
+    assert compact < regular / 2
@@ -0,0 +1,69 @@
+from squerly.boolean import eq, isin, matches, startswith
+from squerly.query import Index, List, Queryable, make_model
+
+DATA = {
+    "a": 1,
+    "b": 2,
+    "c": [
+        {"foo": "foo value 0", "bar": "bar value 0"},
+        {"foo": "foo value 1", "bar": "bar value 1", "baz": {"foo": "foo value 2"}},
+    ],
+}
+
+PLAIN = Queryable(DATA)
+INDEXED = Queryable(DATA, index=True)
+
+
+def test_index_owners():
+    index = Index()
+    model = make_model(DATA, index=index)
+    assert index.owners("a") == [model]
+    assert index.owners("foo") == [model["c"][0], model["c"][1], model["c"][1]["baz"]]
+    assert index.owners("missing") == []
+
+
+def test_indexed_find_matches_scan():
+    for args in [("a",), ("foo",), ("c", "foo"), ("baz", "foo"), (("foo", "foo value 1"),),
+                 (("a", eq(1)),), (matches("foo"),), ("missing",),
+                 (("foo", isin(["foo value 2", "foo value 0"])),), (("foo", eq("x") | eq("foo value 1")),),
+                 (("foo", "nope"),), (("foo", isin("foo value 0")),)]:
+        expected = PLAIN.find(*args)
+        actual = INDEXED.find(*args)
+        assert actual.values == expected.values, args
+        assert actual.parents.keys() == expected.parents.keys(), args
+
+
+def test_indexed_query():
+    assert len(INDEXED.a) == 1
+    assert len(INDEXED.missing) == 0
+    assert len(INDEXED.c.foo) == 2
+
+
+def test_index_existing_model():
+    model = List([make_model({"kind": "Pod"}), make_model({"kind": "Node"})])
+    conf = Queryable(model, index=True)
+    assert conf.find("kind").values == ["Pod", "Node"]
+
+
+def test_index_owners_with():
+    index = Index()
+    model = make_model(DATA, index=index)
+    assert index.owners_with("foo", ["foo value 1"]) == [model["c"][1]]
+    assert index.owners_with("foo", ["foo value 2", "foo value 0"]) == [model["c"][0], model["c"][1]["baz"]]
+    assert index.owners_with("foo", ["nope"]) == []
+
+
+def test_indexed_where():
+    conf = Queryable(DATA["c"], index=True)
+    plain = Queryable(DATA["c"])
+    for args in [("foo",), ("foo", "foo value 1"), ("baz",), ("foo", isin({"foo value 0", "foo value 1"})),
+                 ("foo", matches("1$")), ("foo", startswith("foo value 0")), ("foo", lambda v: v.endswith("0")),
+                 ("foo", eq("x") | matches("0$")), ("foo", lambda v: False)]:
+        assert len(conf.where(*args)) == len(plain.where(*args)), args
+    assert conf.where("foo", "foo value 1").bar.value == "bar value 1"
+    assert conf.where("foo", matches("1$")).bar.value == "bar value 1"
+
+    conf = Queryable([{"foo": "abc", "n": 1}, {"foo": "xyz", "n": 2}], index=True)
+    assert conf.where("foo", matches("ab")).n.values == [1]
+    assert conf.where("foo", startswith("x")).n.values == [2]
+    assert len(conf.where("n", lambda v: v > 2)) == 0
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from squerly.interning import Interner
+from squerly.query import make_model
+
+
+def docs():
+    # json gives every document its own copies of the strings.
+    text = '{"kind": "Pod", "metadata": {"namespace": "default"}, "spec": {"args": ["a", "%s"]}}'
+    return [json.loads(text % ("x" * 300)) for _ in range(3)]
+
+
+def test_interned_keys():
+    interner = Interner()
+    models = [make_model(d, interner=interner) for d in docs()]
+    keys = [[k for k in m if k == "metadata"][0] for m in models]
+    assert keys[0] is keys[1] is keys[2]
+    nested = [[k for k in m["metadata"]][0] for m in models]
+    assert nested[0] is nested[1]
+    assert models[0]["metadata"]["namespace"] is not models[1]["metadata"]["namespace"]
+    assert interner.saved > 0
+    assert interner.replaced == 10
+
+
+def test_interned_values():
+    interner = Interner(values=True)
+    models = [make_model(d, interner=interner) for d in docs()]
+    assert models[0]["metadata"]["namespace"] is models[2]["metadata"]["namespace"]
+    assert models[0]["spec"]["args"][0] is models[1]["spec"]["args"][0]
+    # Longer than max_length.
+    assert models[0]["spec"]["args"][1] is not models[1]["spec"]["args"][1]
+    assert models[1]["spec"]["args"].parent is models[1]["spec"]
+    assert "replaced" in interner.report()
+
+
+def test_interner_not_lazy():
+    with pytest.raises(ValueError):
+        make_model({}, lazy=True, interner=Interner())
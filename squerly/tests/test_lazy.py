@@ -0,0 +1,48 @@
+from squerly.boolean import matches
+from squerly.query import LazyDict, LazyList, Queryable, make_model
+
+DATA = [
+    {
+        "top": {
+            "a": {"r": {"b": 45}},
+            "d": 2,
+            "c": {"a": 2, "b": 4},
+            "l": [{"a": 7}, [1, 2]],
+        },
+        "other": {"deep": {"a": 1}},
+    },
+    {"top": {"a": 9, "b": 6, "c": {"a": 8, "b": 7}}},
+]
+
+
+def test_lazy_converts_on_access():
+    model = make_model(DATA, lazy=True)
+    assert isinstance(model, LazyList)
+    assert type(list.__getitem__(model, 0)) is dict
+
+    doc = model[0]
+    assert isinstance(doc, LazyDict)
+    assert doc.parent is model
+    assert model[0] is doc
+    assert type(dict.__getitem__(doc, "other")) is dict
+
+    top = doc["top"]
+    assert top.parent is doc
+    assert type(dict.__getitem__(doc, "other")) is dict
+
+
+def test_lazy_query_leaves_untouched_raw():
+    conf = Queryable(DATA, lazy=True)
+    assert conf.top.d.value == 2
+    doc = list.__getitem__(conf._value, 0)
+    assert type(dict.__getitem__(doc, "other")) is dict
+
+
+def test_lazy_queries_match_eager():
+    eager = Queryable(DATA)
+    lazy = Queryable(DATA, lazy=True)
+    for q in [lambda c: c.find("a"), lambda c: c.find("b").upto("a"), lambda c: c.find("a").parents,
+              lambda c: c.top.c.b, lambda c: c.find("a").roots.top.d, lambda c: c.top.where("d", 2),
+              lambda c: c.find(matches("^a$"), "r"), lambda c: c.top.l]:
+        assert repr(q(lazy)) == repr(q(eager))
+    assert lazy.keys() == eager.keys()
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import tempfile
+from functools import partial
+
+import pytest
+
+from squerly import AsyncLoader, load_streams
+
+
+def pod(i):
+    return json.dumps({"kind": "Pod", "metadata": {"name": "pod-%d" % i}}).encode("utf-8")
+
+
+async def chunks(data, size=7):
+    for i in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[i:i + size]
+
+
+def test_load_streams(tmp_path):
+    path = str(tmp_path / "node.yaml")
+    with open(path, "w") as f:
+        f.write("kind: Node\nmetadata:\n  name: node-0\n")
+
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"kind: Pod\nmetadata:\n  name: pod-2\n")
+        reader.feed_eof()
+        return await load_streams([pod(0), chunks(pod(1)), reader, path], index=True)
+
+    conf = asyncio.run(main())
+    assert sorted(conf.metadata.name.values) == ["node-0", "pod-0", "pod-1", "pod-2"]
+    assert conf.find(("kind", "Node")).roots.metadata.name.values == ["node-0"]
+    assert sorted(d.source for d in conf._value if d["kind"] == "Pod") == [0, 1, 2]
+    assert conf.find(("kind", "Node")).roots._value[0].source == path
+
+
+def test_bytes_like():
+    sources = [bytearray(pod(0)), memoryview(pod(1))]
+    conf = asyncio.run(load_streams(sources))
+    assert sorted(conf.metadata.name.values) == ["pod-0", "pod-1"]
+
+
+def test_writer_closed():
+    class Writer(object):
+        closed = waited = False
+
+        def close(self):
+            self.closed = True
+
+        async def wait_closed(self):
+            self.waited = True
+            raise ConnectionResetError()
+
+    writer = Writer()
+
+    async def connect():
+        reader = asyncio.StreamReader()
+        reader.feed_data(pod(0))
+        reader.feed_eof()
+        return reader, writer
+
+    conf = asyncio.run(load_streams([connect]))
+    assert conf.metadata.name.values == ["pod-0"]
+    assert writer.closed and writer.waited
+
+
+def test_load_sockets():
+    directory = tempfile.mkdtemp()
+    paths = [os.path.join(directory, "s%d" % i) for i in range(5)]
+
+    async def main():
+        servers = []
+        for i, p in enumerate(paths):
+
+            async def serve(reader, writer, i=i):
+                writer.write(pod(i))
+                await writer.drain()
+                writer.close()
+
+            servers.append(await asyncio.start_unix_server(serve, path=p))
+        try:
+            sources = dict(("socket-%d" % i, partial(asyncio.open_unix_connection, p)) for i, p in enumerate(paths))
+            return await load_streams(sources, limit=2)
+        finally:
+            for s in servers:
+                s.close()
+
+    conf = asyncio.run(main())
+    assert sorted(conf.metadata.name.values) == ["pod-%d" % i for i in range(5)]
+    assert sorted(d.source for d in conf._value) == ["socket-%d" % i for i in range(5)]
+
+
+def test_queryable_while_loading():
+    loader = AsyncLoader()
+
+    async def main():
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            yield pod(1)
+
+        task = asyncio.ensure_future(loader.load([pod(0), slow()]))
+        while not loader.roots:
+            await asyncio.sleep(0.01)
+        names = loader.queryable().metadata.name.values
+        release.set()
+        await task
+        return names
+
+    assert asyncio.run(main()) == ["pod-0"]
+    assert sorted(loader.queryable().metadata.name.values) == ["pod-0", "pod-1"]
+
+
+def test_errors():
+    async def broken():
+        raise IOError("connection reset")
+        yield b""
+
+    loader = AsyncLoader()
+    conf = asyncio.run(loader.load({"good": pod(0), "bad": b"- [", "broken": broken(), "scalar": b"3"}))
+    assert conf.metadata.name.values == ["pod-0"]
+    assert sorted(name for name, _ in loader.errors) == ["bad", "broken", "scalar"]
+    assert "1 loaded, 3 errors" in repr(loader)
+
+
+def test_start_in_thread():
+    loader = AsyncLoader()
+    loader.start([chunks(pod(i)) for i in range(20)])
+    assert loader.wait(10)
+    assert len(loader.queryable().metadata.name.values) == 20
+
+
+def test_query_while_starting():
+    loader = AsyncLoader(index=True)
+    loader.start([chunks(pod(i), size=3) for i in range(300)])
+    sizes = []
+    while True:
+        done = loader.wait(0)
+        conf = loader.queryable()
+        # The index always matches the documents in the snapshot.
+        assert len(conf.find("name").values) == len(conf._value)
+        assert len(conf.find(("kind", "Pod")).values) == len(conf._value)
+        sizes.append(len(conf._value))
+        if done:
+            break
+    assert sizes[-1] == 300
+    assert sizes == sorted(sizes)
+
+
+def test_wait_raises():
+    loader = AsyncLoader()
+    # Not a list of sources.
+    loader.start(5)
+    with pytest.raises(TypeError):
+        loader.wait(10)
+
+    with pytest.raises(ValueError):
+        AsyncLoader(limit=0)
@@ -0,0 +1,74 @@
+import json
+import sys
+
+from squerly.query import CompactDict, Dict, Index, List, Queryable, _flatten, make_model
+from squerly.snapshot import load_snapshot, save_snapshot
+
+DOC = {
+    "a": [1, {"b": 2, "c": [[3], {"d": 4}]}],
+    "e": {"f": 5, "g": []},
+    "h": 6,
+}
+
+
+def test_make_model_copies_everything():
+    m = make_model(DOC)
+    assert json.loads(json.dumps(m)) == DOC
+    assert type(m["a"]) is List and type(m["a"][1]) is Dict
+    assert m["a"][1]["c"][1].parent is m["a"][1]["c"]
+    assert m["a"][1]["c"].parent is m["a"][1]
+    assert m["e"]["g"].parent is m["e"]
+    assert list(m) == ["a", "e", "h"]
+
+
+def test_make_model_compact_top_node():
+    m = make_model(DOC, compact=True)
+    assert type(m) is Dict
+    assert type(m["e"]) is CompactDict
+    assert m["e"].parent is m
+
+
+def test_flatten_pre_order():
+    m = make_model(DOC)
+    flat = list(_flatten(m))
+    assert flat[0] is m
+    assert [i for i in flat if not isinstance(i, Dict)] == [1, 2, 3, 4, 5, 6]
+    assert [sorted(i) for i in flat if isinstance(i, Dict)] == [["a", "e", "h"], ["b", "c"], ["d"], ["f", "g"]]
+
+
+def test_index_in_find_order():
+    index = Index()
+    m = make_model([DOC, DOC], index=index)
+    assert index.owners("b") == [m[0]["a"][1], m[1]["a"][1]]
+    assert index.owners("d") == [m[0]["a"][1]["c"][1], m[1]["a"][1]["c"][1]]
+
+
+def test_deep_documents():
+    depth = sys.getrecursionlimit() * 2
+    doc = leaf = {}
+    for _ in range(depth):
+        leaf["child"] = [{}]
+        leaf = leaf["child"][0]
+    leaf["name"] = "bottom"
+
+    conf = Queryable(doc, index=True)
+    assert conf.find("name").values == ["bottom"]
+    assert len(conf.find("child")) == depth
+
+
+def test_deep_snapshot(tmp_path):
+    depth = sys.getrecursionlimit() * 3
+    doc = leaf = {}
+    for _ in range(depth):
+        leaf["child"] = [{}]
+        leaf = leaf["child"][0]
+    leaf["name"] = "bottom"
+
+    path = str(tmp_path / "deep.sqz")
+    save_snapshot(Queryable(doc, index=True), path)
+    with open(path, "rb") as f:
+        assert b"table" in f.read(100)
+    conf = load_snapshot(path)
+    assert conf.find("name").values == ["bottom"]
+    assert conf.find("name").roots._value[0] is conf._value
+    assert len(conf.find("child")) == depth
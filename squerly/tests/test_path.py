@@ -0,0 +1,64 @@
+from squerly.query import Queryable, compile_path
+
+DATA = [
+    {
+        "status": {
+            "nodeStatuses": [
+                {"currentRevision": 6, "nodeName": "control-plane-0"},
+                {"currentRevision": 5, "nodeName": "control-plane-1", "targetRevision": 6},
+            ],
+            "conditions": [[{"type": "nested"}], {"type": "Available"}],
+        },
+        "metadata": {"labels": {"app.kubernetes.io/name": "a"}},
+    },
+    {"status": {"nodeStatuses": {"nodeName": "single"}}},
+    {"status": "scalar"},
+]
+
+CONF = Queryable(DATA)
+
+
+def test_path_matches_chained_queries():
+    assert repr(compile_path("status.nodeStatuses.nodeName")(CONF)) == repr(CONF.status.nodeStatuses.nodeName)
+    assert repr(compile_path("status.conditions.type")(CONF)) == repr(CONF.status.conditions.type)
+    assert repr(compile_path("status")(CONF)) == repr(CONF.status)
+    assert len(compile_path("status.missing.nodeName")(CONF)) == 0
+
+
+def test_path_from_result():
+    status = CONF.status
+    assert compile_path("nodeStatuses.nodeName")(status).values == status.nodeStatuses.nodeName.values
+
+
+def test_path_parents():
+    res = compile_path("status.nodeStatuses.nodeName")(CONF)
+    assert res.parents.currentRevision.values == [6, 5]
+
+
+def test_path_keys_with_dots():
+    res = compile_path(("metadata", "labels", "app.kubernetes.io/name"))(CONF)
+    assert res.values == ["a"]
+
+
+def test_path_is_cached():
+    assert compile_path("status.nodeStatuses") is compile_path("status.nodeStatuses")
+
+
+def test_path_positions():
+    docs = [{"a": [[1, 2], [3, 4]], "b": {"0": "key"}}, {"a": [[5, 6]]}, {"a": [7]}]
+    conf = Queryable(docs)
+    for i, j in [(0, 1), (1, 0), (-1, -1), (2, 0)]:
+        expected = []
+        for d in docs:
+            try:
+                expected.append(d["a"][i][j])
+            except (IndexError, TypeError):
+                pass
+        assert compile_path(("a", i, j))(conf).values == expected
+    assert compile_path("a.0.1")(conf).values == [2, 6]
+
+    assert compile_path("status.conditions.0.0.type")(CONF).values == ["nested"]
+    assert compile_path("b.0")(conf).values == ["key"]
+    # Matches are held by the lists they're in.
+    res = compile_path("a.0")(conf)._value
+    assert [d.parent for d in res] == [d["a"] for d in conf._value]
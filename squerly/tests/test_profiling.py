@@ -0,0 +1,48 @@
+from squerly import profiling
+from squerly.boolean import matches
+from squerly.profiling import profile
+from squerly.query import Queryable
+
+DATA = Queryable(
+    {
+        "a": 1,
+        "b": 2,
+        "c": [
+            {"foo": "foo value 0", "bar": "bar value 0"},
+            {"foo": "foo value 1", "bar": "bar value 1", "baz": {"foo": 3}},
+        ],
+    }
+)
+
+
+def test_profile_records_operations():
+    with profile() as prof:
+        DATA.find(("foo", matches("value 1"))).upto("c")
+        repr(DATA.c)
+
+    assert prof.ops["find"].calls == 1
+    assert prof.ops["find"].nodes == 11
+    assert prof.ops["find"].predicates == 4
+    # The root has no foo, and the integer under baz.foo makes re.search raise.
+    assert prof.ops["find"].exceptions == 2
+    assert prof.ops["upto"].calls == 1
+    assert prof.ops["query"].calls == 1
+    assert prof.ops["repr"].calls == 1
+    assert "find" in prof.summary()
+    assert profiling.current is None
+
+
+def test_profile_where_lambda():
+    with profile() as prof:
+        DATA.c.where(lambda s: s.foo.value == "foo value 0")
+    assert prof.ops["where"].predicates == 2
+    assert prof.ops["query"].calls == 1
+
+
+def test_enable_disable():
+    prof = profiling.enable()
+    DATA.find("foo")
+    assert profiling.disable() is prof
+    assert prof.ops["find"].calls == 1
+    DATA.find("foo")
+    assert prof.ops["find"].calls == 1
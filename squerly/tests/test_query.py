@@ -1,5 +1,5 @@
 from squerly.boolean import eq, matches
-from squerly.query import Queryable
+from squerly.query import Queryable, from_json
 
 
 DICT_DATA = Queryable(
@@ -53,3 +53,26 @@ def test_complex_value_query():
 
     assert len(LIST_DATA["foo", matches("foo value 0")]) == 1
     assert len(LIST_DATA["foo", matches("foo value.*")]) == 2
+
+
+def test_result_len_is_cached():
+    res = DICT_DATA.c.foo._value
+    assert len(res) == 2
+    assert res._count == 2
+    assert res
+
+    res.append(res[0])
+    assert res._count is None
+    assert len(res) == 3
+
+    del res[:]
+    assert len(res) == 0
+    assert not res
+
+
+def test_from_json(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text('{"status": {"conditions": [{"type": "Available"}]}}')
+    conf = from_json(str(path))
+    assert conf.status.conditions.type.value == "Available"
+    assert conf.status.conditions.type.parents.type.values == ["Available"]
@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+import yaml
+
+from squerly import Queryable, RenderOptions, render
+from squerly.rendering import _Dumper
+
+CONF = Queryable([{"name": "pod-%d" % i, "ports": list(range(i % 5))} for i in range(100)])
+
+
+def test_repr_is_truncated():
+    text = repr(CONF)
+    assert text.endswith("# items 1-50 of 100\n")
+    assert "pod-49" in text
+    assert "pod-50" not in text
+
+
+def test_nested_lists_are_truncated():
+    text = render(CONF._value, RenderOptions(limit=2))
+    data = yaml.safe_load(text)
+    assert len(data) == 2
+    assert data[1]["ports"] == [0]
+    assert render(CONF._value[4], RenderOptions(limit=2)) == "name: pod-4\nports:\n- 0\n- 1\n- '... 2 more'\n"
+
+
+def test_nodes_limit():
+    data = yaml.safe_load(render(CONF._value, RenderOptions(nodes=10)))
+    assert data[-1] == "..."
+    assert len(data) < 10
+
+
+@pytest.mark.parametrize("format", ["yaml", "json"])
+def test_real_dots_are_kept(format):
+    value = {"...": "real", "a": list(range(20))}
+    text = render(value, RenderOptions(nodes=5, format=format))
+    assert "real" in text
+    assert text.count("...") == 4
+
+    items = ["..."] * 3
+    assert render(items, RenderOptions(nodes=2, format=format)).endswith("# items 1-2 of 3\n")
+    assert "# items" not in render(items, RenderOptions(nodes=3, format=format))
+
+
+def test_result_footer_counts_items():
+    res = CONF.ports
+    text = render(res._value, RenderOptions(limit=3))
+    assert text.endswith("# items 1-3 of 100\n")
+
+
+def test_everything_fits():
+    assert repr(CONF.where("name", "pod-0")) == "- name: pod-0\n  ports: []\n"
+    assert render(CONF._value, RenderOptions(limit=None, nodes=None)) == yaml.dump(CONF._value, Dumper=_Dumper)
+
+
+def test_page():
+    page = CONF.page(3, size=10)
+    assert repr(page) == page
+    assert page.endswith("# items 21-30 of 100\n")
+    assert yaml.safe_load(page)[0]["name"] == "pod-20"
+    assert CONF.page(20, size=10).startswith("[]")
+    assert json.loads(CONF.page(2, size=5, format="json").split("#")[0])[0]["name"] == "pod-5"
+
+
+def test_dump():
+    out = io.StringIO()
+    CONF.dump(out)
+    assert out.getvalue() == yaml.dump(CONF._value, Dumper=_Dumper)
+
+    out = io.StringIO()
+    CONF.name.dump(out, format="json")
+    assert json.loads(out.getvalue()) == [{"name": "pod-%d" % i} for i in range(100)]
+
+    out = io.StringIO()
+    Queryable([]).dump(out)
+    assert out.getvalue() == "[]\n"
+
+
+def test_bad_format():
+    with pytest.raises(ValueError):
+        RenderOptions(format="xml")
@@ -0,0 +1,39 @@
+from squerly.query import Queryable
+
+DATA = [
+    {
+        "kind": "Pod",
+        "metadata": {"name": "a", "labels": {"app.kubernetes.io/name": "x"}},
+        "status": {"phase": "Running", "containerStatuses": [{"ready": True}, {"ready": False}]},
+    },
+    {"kind": "Pod", "metadata": {"name": "b"}, "status": {"phase": "Pending"}},
+    {"kind": "Node", "metadata": {"name": "n"}, "status": "scalar"},
+]
+
+CONF = Queryable(DATA)
+
+
+def test_select():
+    res = CONF.select("metadata.name", "status.phase", "missing")
+    assert res == {
+        "metadata.name": ["a", "b", "n"],
+        "status.phase": ["Running", "Pending", None],
+        "missing": [None, None, None],
+    }
+
+
+def test_select_through_lists():
+    res = CONF.select("status.containerStatuses.ready")
+    assert res["status.containerStatuses.ready"] == [[True, False], None, None]
+
+
+def test_select_tuple_path():
+    res = CONF.select(("metadata", "labels", "app.kubernetes.io/name"))
+    assert res[("metadata", "labels", "app.kubernetes.io/name")] == ["x", None, None]
+
+
+def test_select_rows():
+    pods = CONF.where("kind", "Pod")
+    assert pods.select("metadata.name") == {"metadata.name": ["a", "b"]}
+    assert CONF.metadata.select("name") == {"name": ["a", "b", "n"]}
+    assert Queryable(DATA[0]).select("kind") == {"kind": ["Pod"]}
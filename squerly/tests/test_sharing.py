@@ -0,0 +1,179 @@
+import pickle
+
+import pytest
+
+from squerly import Index, List, Queryable, SharedDict, SubtreeTable, compile_path, make_model
+
+
+def pod(name, image, node="node-0"):
+    return {
+        "kind": "Pod",
+        "metadata": {"name": name, "labels": {"app": "web"}},
+        "spec": {
+            "nodeName": node,
+            "containers": [{"name": "web", "image": image, "ports": [{"containerPort": 80}]}],
+            "tolerations": [{"key": "a", "effect": "NoSchedule"}],
+        },
+    }
+
+
+def docs():
+    return [
+        pod("web-0", "nginx"),
+        pod("web-1", "nginx"),
+        pod("web-2", "httpd"),
+        pod("web-3", "nginx", node="node-1"),
+    ]
+
+
+def models(share=None, index=None):
+    return Queryable(List(make_model(d, index=index, share=share) for d in docs()), index=index)
+
+
+def names(q):
+    return sorted(q.metadata.name.values)
+
+
+def test_identical_subtrees_are_shared():
+    table = SubtreeTable()
+    conf = models(share=table)
+    roots = conf._value
+    assert isinstance(roots[0]["spec"], SharedDict)
+    assert roots[0]["spec"] is roots[1]["spec"]
+    assert roots[0]["spec"] is not roots[2]["spec"]
+    assert roots[0]["metadata"]["labels"] is roots[2]["metadata"]["labels"]
+    assert roots[0]["spec"]["tolerations"] is roots[3]["spec"]["tolerations"]
+    assert roots[0]["spec"].parents == [roots[0], roots[1]]
+    assert table.shared > 0
+    assert "shared" in table.report()
+
+
+def restricted():
+    # Ways to narrow the documents down before going back up.
+    return [
+        lambda c: c,
+        lambda c: c.find(("name", "web-0")).roots,
+        lambda c: c.find(("nodeName", "node-1")).roots,
+        lambda c: c.find(("image", "httpd")).roots,
+        lambda c: c.where("kind", "Pod")[1:3],
+        lambda c: c.find(("name", "web-1")).roots.spec,
+    ]
+
+
+def upward():
+    return [
+        lambda s: s.find("image"),
+        lambda s: s.find(("image", "nginx")).parents,
+        lambda s: s.find("effect").upto("spec"),
+        lambda s: s.find("effect").parents,
+        lambda s: s.find("containerPort").parents.parents.parents,
+        lambda s: s.spec.containers.where("image", "nginx").parents,
+        lambda s: s.find("containers").image,
+        lambda s: compile_path("spec.containers.image")(s),
+        lambda s: compile_path("containers.0.ports.0")(s),
+        lambda s: s.find("name")[0:2],
+    ]
+
+
+def assert_parity(shared, plain):
+    for narrow in restricted():
+        for query in upward():
+            s, p = query(narrow(shared)), query(narrow(plain))
+            # Model Lists only equal themselves, so compare how they print.
+            assert [str(v) for v in s.values] == [str(v) for v in p.values]
+            assert len(s) == len(p)
+            assert len(s.parents) == len(p.parents)
+            assert names(s.roots) == names(p.roots)
+            assert len(s.roots) == len(p.roots)
+
+
+def test_queries_match_unshared():
+    assert_parity(models(share=SubtreeTable()), models())
+
+
+def test_indexed_queries_match_unshared():
+    assert_parity(models(share=SubtreeTable(), index=Index()), models(index=Index()))
+
+
+def test_roots_of_shared_match():
+    conf = models(share=SubtreeTable())
+    assert names(conf.find(("image", "nginx")).roots) == ["web-0", "web-1", "web-3"]
+    assert names(conf.find(("nodeName", "node-0")).roots) == ["web-0", "web-1", "web-2"]
+    assert names(conf.find("effect").parents.roots) == ["web-0", "web-1", "web-2", "web-3"]
+
+
+def test_roots_of_restricted_shared():
+    conf = models(share=SubtreeTable())
+    sel = conf.find(("name", "web-0")).roots
+    assert names(sel.find("image").roots) == ["web-0"]
+    assert names(sel.find("effect").parents.roots) == ["web-0"]
+    assert names(sel.find(("image", "nginx")).upto("spec").roots) == ["web-0"]
+    sel = conf.find(("nodeName", "node-0")).roots
+    assert names(sel.find("tolerations").roots) == ["web-0", "web-1", "web-2"]
+    groups = sel.spec.containers.group_by("image")
+    assert names(groups["nginx"].roots) == ["web-0", "web-1"]
+    assert names(groups["httpd"].roots) == ["web-2"]
+
+
+def test_models_sharing_a_table():
+    for index in (None, Index()):
+        table = SubtreeTable()
+        d = docs()
+        first = Queryable(List(make_model(x, share=table, index=index) for x in d[:2]), index=index)
+        Queryable(List(make_model(x, share=table) for x in d[2:]))
+        assert names(first.find(("image", "nginx")).roots) == ["web-0", "web-1"]
+        assert names(first.find("effect").upto("spec").roots) == ["web-0", "web-1"]
+        assert names(first.find("effect").parents.roots) == ["web-0", "web-1"]
+
+
+def test_upto_shared():
+    conf = models(share=SubtreeTable())
+    plain = models()
+    s = conf.find(("image", "nginx")).upto("spec")
+    p = plain.find(("image", "nginx")).upto("spec")
+    # A spec shared by two pods is still found once for each of them.
+    assert len(s) == len(p) == 3
+    assert names(s.roots) == names(p.roots) == ["web-0", "web-1", "web-3"]
+    assert names(conf.find("containerPort").upto("containers").roots) == ["web-0", "web-1", "web-2", "web-3"]
+
+
+def test_shared_index():
+    index = Index()
+    conf = models(share=SubtreeTable(), index=index)
+    assert conf.find("image").values == ["nginx", "nginx", "httpd", "nginx"]
+    assert names(conf.find(("image", "nginx")).roots) == ["web-0", "web-1", "web-3"]
+    assert names(conf.find(("name", "web-3")).roots.find("image").roots) == ["web-3"]
+
+
+def test_shared_nodes_are_read_only():
+    conf = models(share=SubtreeTable())
+    spec = conf._value[0]["spec"]
+    with pytest.raises(TypeError):
+        spec["nodeName"] = "node-2"
+    with pytest.raises(TypeError):
+        spec["containers"].append({})
+    conf._value[0]["kind"] = "Deployment"
+
+
+def test_shared_pickle():
+    conf = models(share=SubtreeTable())
+    roots = pickle.loads(pickle.dumps(conf._value))
+    assert roots[0]["spec"] is roots[1]["spec"]
+    assert roots[0]["spec"].parents == [roots[0], roots[1]]
+    assert names(Queryable(roots).find(("image", "nginx")).roots) == ["web-0", "web-1", "web-3"]
+
+
+def test_release():
+    table = SubtreeTable()
+    roots = [make_model(d, share=table) for d in docs()]
+    size = len(table.table)
+    table.release(roots[2])
+    assert len(table.table) < size
+    conf = Queryable(List(roots[:2] + roots[3:]))
+    assert names(conf.find("effect").roots) == ["web-0", "web-1", "web-3"]
+    assert roots[0]["spec"].parents == [roots[0], roots[1]]
+
+
+def test_share_not_lazy():
+    with pytest.raises(ValueError):
+        make_model({}, lazy=True, share=SubtreeTable())
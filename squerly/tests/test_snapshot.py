@@ -0,0 +1,69 @@
+import pytest
+
+from squerly.query import Index, List, Queryable, make_model, _get_index
+from squerly.sharing import SubtreeTable
+from squerly.snapshot import _from_table, _to_table, load_snapshot, save_snapshot
+
+DOCS = [
+    {"kind": "Pod", "metadata": {"name": "a"}, "status": {"conditions": [{"type": "Ready", "status": "True"}]}},
+    {"kind": "Node", "metadata": {"name": "n"}, "status": {"conditions": [{"type": "Ready", "status": "False"}]}},
+]
+
+
+def build(**kwargs):
+    index = Index() if kwargs.pop("index", False) else None
+    roots = List()
+    for i, doc in enumerate(DOCS):
+        d = make_model(doc, index=index, **kwargs)
+        d.source = "doc%d.yaml" % i
+        roots.append(d)
+    return Queryable(roots, index=index)
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "conf.sqz")
+    conf = build(index=True)
+    save_snapshot(conf, path)
+    loaded = load_snapshot(path)
+
+    assert repr(loaded) == repr(conf)
+    assert [d.source for d in loaded._value] == ["doc0.yaml", "doc1.yaml"]
+    assert loaded.find(("status", "False")).roots.kind.values == ["Node"]
+    assert [r.source for r in loaded.find("type").roots._value] == ["doc0.yaml", "doc1.yaml"]
+
+    index = _get_index(loaded._value)
+    assert index is not None
+    assert index.owners("kind")[0] is loaded._value[0]
+    assert loaded.find(("kind", "Pod")).values == ["Pod"]
+
+
+@pytest.mark.parametrize("kwargs", [{"compact": True}, {"lazy": True}])
+def test_snapshot_other_models(tmp_path, kwargs):
+    path = str(tmp_path / "conf.sqz")
+    conf = build(**kwargs)
+    save_snapshot(conf, path)
+    loaded = load_snapshot(path)
+    assert loaded.status.conditions.type.parents.parents.parents.kind.values == ["Pod", "Node"]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"index": True}, {"compact": True}, {"lazy": True}, {"share": SubtreeTable()}, {"share": SubtreeTable(), "index": True}],
+)
+def test_snapshot_table(kwargs):
+    # Deep models are saved as a table of nodes.
+    conf = build(**kwargs)
+    loaded = Queryable(_from_table(_to_table(conf._value)))
+    assert repr(loaded) == repr(conf)
+    assert [d.source for d in loaded._value] == ["doc0.yaml", "doc1.yaml"]
+    assert loaded.status.conditions.type.parents.parents.parents.kind.values == ["Pod", "Node"]
+    assert loaded.find(("status", "False")).roots.kind.values == ["Node"]
+
+
+def test_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / "other"
+    path.write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError):
+        load_snapshot(str(path))
+    with pytest.raises(ValueError):
+        save_snapshot({"a": 1}, str(tmp_path / "conf.sqz"))
@@ -0,0 +1,60 @@
+from squerly.boolean import matches
+from squerly.stream import Stream, from_yaml_stream
+
+DOCS = """\
+kind: Pod
+metadata:
+  name: one
+status:
+  conditions:
+  - type: Ready
+    status: 'True'
+---
+kind: Node
+metadata:
+  name: two
+status:
+  conditions:
+  - type: Ready
+    status: 'False'
+---
+just a string
+---
+kind: Pod
+metadata:
+  name: three
+"""
+
+
+def write_docs(tmp_path):
+    path = tmp_path / "docs.yaml"
+    path.write_text(DOCS)
+    return str(path)
+
+
+def test_stream_find(tmp_path):
+    stream = from_yaml_stream(write_docs(tmp_path))
+    names = [q.value for q in stream.find("name")]
+    assert names == ["one", "two", "three"]
+
+    # The stream can be iterated again.
+    assert len(list(stream.find("name"))) == 3
+
+
+def test_stream_pipeline(tmp_path):
+    stream = from_yaml_stream(write_docs(tmp_path))
+    res = stream.find(("status", "False")).upto("conditions").roots.metadata.name.collect()
+    assert res.values == ["two"]
+
+    res = stream.where("kind", "Pod").metadata.name.collect()
+    assert res.values == ["one", "three"]
+
+    res = stream.find(("name", matches("^t"))).collect()
+    assert res.values == ["two", "three"]
+
+    assert len(stream.find("missing").collect()) == 0
+
+
+def test_stream_over_iterable():
+    docs = iter([{"a": 1}, {"a": 2, "b": {"a": 3}}])
+    assert [q.value for q in Stream(docs).find("a")] == [1, 2, 3]
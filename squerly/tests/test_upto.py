@@ -1,4 +1,4 @@
-from squerly import Queryable
+from squerly import ANY, Queryable
 
 
 A = Queryable({
@@ -73,3 +73,18 @@ def test_upto_nested_children_ambiguous_top():
 
     res = D.find("b").upto("c")
     assert len(res) == 1, res
+
+
+def test_upto_shared_ancestors():
+    E = Queryable([
+        {"items": [{"metadata": {"name": "x", "labels": {"a": 1, "b": 2}}}, {"metadata": {"name": "y"}}]},
+    ])
+    res = E.find("labels", ANY).upto("items")
+    assert len(res) == 1, res
+    res = E.find("name").upto("items")
+    assert len(res) == 2, res
+    assert res.metadata.name.values == ["x", "y"]
+
+
+def test_upto_from_roots():
+    assert len(C.upto("top")) == 0
@@ -1,4 +1,4 @@
-from squerly.query import Queryable, q
+from squerly.query import Queryable, _Queryable, q
 
 
 DICT_DATA = Queryable(
@@ -52,3 +52,61 @@ def test_where_multiple_predicates():
 
     assert len(LIST_DATA.where(q("foo") & q("bar"))) == 2
     assert len(LIST_DATA.where(q("foo") & q("bar") & q("baz"))) == 1
+
+
+ROWS = Queryable(
+    [
+        {"a": 1, "b": 1, "l": [1], "d": {"x": "y"}, "e": []},
+        {"a": 1, "b": 2, "l": [1, 2], "d": {"x": "z"}},
+        {"a": 2, "l": [], "d": [{"x": "y"}, {"x": "w"}]},
+        {"b": 2, "d": "scalar"},
+        5,
+    ]
+)
+
+PREDICATES = [
+    lambda s: s.a != s.b,
+    lambda s: s.a == s.b,
+    lambda s: s.a < s.b,
+    lambda s: s.a.value > 1,
+    lambda s: s.l.value == 1,
+    lambda s: bool(s.l),
+    lambda s: bool(s.e),
+    lambda s: not s.b,
+    lambda s: len(s.l) == 2,
+    lambda s: s.d.x.value == "y",
+    lambda s: "y" in s.d.x.values,
+    lambda s: s["d"]["x"].value == "z",
+    lambda s: s.d.x.matches("^[yz]$"),
+    lambda s: s.d.parents.a.value == 2,
+    lambda s: s.a.isin({2}),
+    lambda s: "a" in s.keys(),
+    lambda s: s.missing.value,
+]
+
+
+def guarded(p):
+    def inner(s):
+        try:
+            return p(s)
+        except AssertionError:
+            return False
+
+    return inner
+
+
+def outcome(f):
+    try:
+        return repr(ROWS.where(f))
+    except Exception as ex:
+        return type(ex)
+
+
+def test_where_lambda_matches_generic_queryable():
+    for p in PREDICATES:
+        assert outcome(p) == outcome(lambda s: p(_Queryable(s._value)))
+
+    # The same, but with rows that raise left out instead of failing the
+    # whole where.
+    for p in PREDICATES:
+        assert outcome(guarded(p)) == outcome(guarded(lambda s: p(_Queryable(s._value))))
@@ -0,0 +1,98 @@
+import re
+
+from squerly.boolean import UNKNOWN, All, Any, Not, Predicate, _isin, eq, isin, matches, optimize, pred, search_any, startswith
+from squerly.query import Queryable, q
+
+VALUES = ["alpha", "beta", "gamma", "alphabet", 3, None, "beta-2"]
+
+EXPRESSIONS = [
+    matches("^a") & (startswith("al") & isin({"alpha", "alphabet"})),
+    matches("t$") | eq("gamma") | (startswith("b") | eq(3)),
+    ~~startswith("a"),
+    ~(eq("beta") | matches("a$")),
+    pred(lambda v: len(v) > 4)() & eq("alpha"),
+]
+
+
+def test_optimize_is_equivalent():
+    for e in EXPRESSIONS:
+        for adaptive in (False, True):
+            o = optimize(e, adaptive=adaptive)
+            assert [bool(o.test(v)) for v in VALUES] == [bool(e.test(v)) for v in VALUES]
+
+
+def test_optimize_flattens_and_orders():
+    o = optimize(matches("^a") & (startswith("al") & isin({"alpha"})))
+    assert len(o.operands) == 3
+    assert [type(p).__name__ for p in o.operands] == ["Predicate"] * 3
+    assert o.operands[0].args == ({"alpha"},)
+    assert o.operands[-1].args[0].pattern == "^a"
+
+    assert isinstance(optimize(~~eq(1)), type(eq(1)))
+    assert not isinstance(optimize(~eq(1)), (All, Any))
+    assert isinstance(optimize(~eq(1)), Not)
+
+
+def test_adaptive_reorders_by_selectivity():
+    rarely_false = pred(lambda v: v != "x")()
+    usually_false = pred(lambda v: v == "x")()
+    o = optimize(rarely_false & usually_false, adaptive=True)
+    for v in VALUES * 300:
+        o.test(v)
+    assert o.operands[0] is usually_false
+
+
+def test_cost_odd_predicates():
+    class Unhashable(object):
+        __eq__ = object.__eq__
+        __hash__ = None
+
+        def __call__(self, value):
+            return value == "alpha"
+
+    p = pred(Unhashable())()
+    assert p.cost == UNKNOWN
+    assert optimize(p & eq("alpha")).operands[0].args == ("alpha",)
+    assert Predicate(_isin).cost
+    assert optimize(Predicate(_isin) | eq(1)).test(1)
+
+
+DATA = Queryable([
+    {"foo": "foo value 0", "bar": "bar value 0"},
+    {"foo": "foo value 1", "bar": "bar value 1", "baz": {"foo": "foo value 2"}},
+])
+
+
+def test_where_optimized():
+    assert len(DATA.where(q("foo", matches("1$")) & (q("bar") & q("baz")))) == 1
+    assert len(DATA.where(q("baz") | (q("foo", "foo value 0") | q("nope")))) == 2
+    assert len(DATA.where(~~q("baz"))) == 1
+    assert len(DATA.where(optimize(q("foo") & q("baz"), adaptive=True))) == 1
+
+
+def test_search_any():
+    p = optimize(search_any(["^al", "ta$"]))
+    assert [bool(p.test(v)) for v in VALUES] == [True, True, False, True, False, False, False]
+
+    p = search_any(["a.b", "mm"], literal=True)
+    assert [bool(p.test(v)) for v in ["a.b", "axb", "gamma"]] == [True, False, True]
+    assert not search_any([]).test("anything")
+
+
+def test_search_any_uncombinable():
+    # Backreferences and inline flags keep their meaning.
+    p = search_any([r"(a)\1", "(?i)BET", "^g"])
+    assert [bool(p.test(v)) for v in ["aa", "alpha", "beta", "gamma", "xg"]] == [True, False, True, True, False]
+    assert not search_any([r"(?P<x>b)(?P=x)"]).test("beta")
+    assert optimize(search_any(["(?i)^A", "ta$"])).test("alpha")
+
+
+def test_bad_pattern_is_false():
+    p = matches("(")
+    assert not p.test("(")
+    assert [bool(search_any(["(", "ta$"]).test(v)) for v in ["(", "beta"]] == [False, True]
+
+
+def test_queryable_matches():
+    assert len(DATA.where(lambda r: r.foo.matches("value 1$"))) == 1
+    assert len(DATA.where(lambda r: r.foo.matches("VALUE", re.I))) == 2